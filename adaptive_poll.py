@@ -0,0 +1,132 @@
+"""
+Adaptive Poll: Rate-limit-aware poll interval for Ar-Nab-h monitors
+Reads X-RateLimit-Remaining / X-RateLimit-Reset to spread the remaining
+budget across the reset window, backs off exponentially on 403/429/5xx and
+tightens the interval for repositories with recent commit activity
+"""
+import threading
+import time
+from typing import Mapping, Optional
+
+
+class RateLimitState:
+    """GitHub rate-limit window shared by every monitor using the same credentials"""
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None  # epoch seconds
+        self.consumers = 0
+        self.shares = 1  # processes drawing from the same window
+        self._lock = threading.Lock()
+
+    def register(self) -> None:
+        """Count one more monitor drawing from this budget"""
+        with self._lock:
+            self.consumers += 1
+
+    def split(self, parts: int) -> None:
+        """Pace for 1/parts of the remaining requests, for one of several processes sharing the credentials"""
+        with self._lock:
+            self.shares = max(1, parts)
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Record the X-RateLimit-* headers of a response"""
+        try:
+            remaining = headers.get('X-RateLimit-Remaining')
+            reset = headers.get('X-RateLimit-Reset')
+            limit = headers.get('X-RateLimit-Limit')
+            with self._lock:
+                if remaining is not None:
+                    self.remaining = int(remaining)
+                if reset is not None:
+                    self.reset_at = float(reset)
+                if limit is not None:
+                    self.limit = int(limit)
+        except (TypeError, ValueError):
+            pass
+
+    def seconds_until_reset(self) -> float:
+        with self._lock:
+            if self.reset_at is None:
+                return 0.0
+            return max(0.0, self.reset_at - time.time())
+
+    def budget_interval(self) -> float:
+        """Shortest interval per consumer that still lasts until the window resets"""
+        # The headers report what is left for the credentials, not for this process
+        with self._lock:
+            if self.remaining is None or self.reset_at is None:
+                return 0.0
+            window = max(0.0, self.reset_at - time.time())
+            if self.remaining <= 0:
+                return window
+            return window * max(1, self.consumers) * self.shares / self.remaining
+
+
+class AdaptivePollPolicy:
+    def __init__(self, base_interval: float, rate_state: Optional[RateLimitState] = None,
+                 min_interval: Optional[float] = None, max_interval: float = 300,
+                 active_factor: float = 0.5, activity_window: float = 600,
+                 max_backoff_exponent: int = 6):
+        self.base_interval = base_interval
+        self.min_interval = min_interval if min_interval is not None else base_interval * active_factor
+        self.max_interval = max_interval
+        self.active_factor = active_factor
+        self.activity_window = activity_window
+        self.max_backoff_exponent = max_backoff_exponent
+
+        self.rate_state = rate_state or RateLimitState()
+        self.rate_state.register()
+
+        self.failures = 0
+        self.retry_after = 0.0
+        self.last_activity: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def observe_response(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Update rate-limit and backoff state from a GitHub response"""
+        self.rate_state.update(headers)
+
+        with self._lock:
+            if status_code in (403, 429) or status_code >= 500:
+                self.failures = min(self.failures + 1, self.max_backoff_exponent)
+                try:
+                    self.retry_after = float(headers.get('Retry-After', 0))
+                except (TypeError, ValueError):
+                    self.retry_after = 0.0
+                # Primary rate limit exhausted: nothing to do until the reset
+                if status_code in (403, 429) and self.rate_state.remaining == 0:
+                    self.retry_after = max(self.retry_after, self.rate_state.seconds_until_reset())
+            else:
+                self.failures = 0
+                self.retry_after = 0.0
+
+    def observe_failure(self) -> None:
+        """Count a connection error or timeout towards the backoff"""
+        with self._lock:
+            self.failures = min(self.failures + 1, self.max_backoff_exponent)
+
+    def observe_activity(self, changes_detected: bool) -> None:
+        """Remember when the repository last produced new commits"""
+        if changes_detected:
+            with self._lock:
+                self.last_activity = time.monotonic()
+
+    def is_active(self) -> bool:
+        with self._lock:
+            return (self.last_activity is not None
+                    and time.monotonic() - self.last_activity < self.activity_window)
+
+    @property
+    def effective_interval(self) -> float:
+        """Seconds until the next poll given activity, budget and backoff"""
+        interval = self.base_interval * self.active_factor if self.is_active() else self.base_interval
+        interval = max(interval, self.min_interval, self.rate_state.budget_interval())
+
+        with self._lock:
+            if self.failures:
+                interval = max(interval, self.base_interval * (2 ** self.failures))
+            interval = min(interval, self.max_interval)
+            # An explicit Retry-After / reset wait always wins over the cap
+            return max(interval, self.retry_after)
@@ -0,0 +1,160 @@
+"""
+Agent Logging: Structured, queue-backed logging for all agents
+Agent threads only put records on an in-memory queue; a single background
+listener formats them and writes the console (human-readable or JSON) and
+an optional JSON-lines file sink. Configured from LOG_LEVEL, LOG_FILE and
+LOG_FORMAT. Reports written with write_output() share that listener, so
+they never interleave with log lines, but always go to stdout unformatted
+and unfiltered by the log level.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+ROOT_LOGGER = "agents"
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue: Optional[queue.SimpleQueue] = None
+_setup_lock = threading.Lock()
+
+
+def fields(**values) -> Dict:
+    """Structured fields for a log call: log.info("...", extra=fields(repo=...))"""
+    return {'fields': values}
+
+
+def _is_output(record: logging.LogRecord) -> bool:
+    return getattr(record, 'output', False)
+
+
+class _OutputHandler(logging.Handler):
+    """Writes write_output() text exactly as given (stdout unless redirected)"""
+
+    def __init__(self, stream=None):
+        super().__init__()
+        self.stream = stream
+
+    def emit(self, record: logging.LogRecord) -> None:
+        stream = self.stream or sys.stdout
+        try:
+            stream.write(record.msg)
+            stream.flush()
+        except Exception:
+            self.handleError(record)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Time-stamped human-readable lines, with structured fields appended"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        stamp = datetime.fromtimestamp(record.created).strftime('%H:%M:%S')
+        level = "" if record.levelno == logging.INFO else f"[{record.levelname}] "
+        line = f"{stamp} {level}{record.getMessage()}"
+        values = getattr(record, 'fields', None)
+        if values:
+            line += "  " + " ".join(f"{key}={value}" for key, value in values.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        for key, value in vars(record).items():
+            if key not in _RESERVED and key != 'fields':
+                entry.setdefault(key, value)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: Optional[str] = None, log_file: Optional[str] = None,
+                  console_format: Optional[str] = None, stream=None,
+                  output=None) -> logging.handlers.QueueListener:
+    """
+    Route every 'agents.*' logger through a queue to a background writer.
+    Safe to call more than once; the first call wins.
+    """
+    global _listener, _queue
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+        log_file = log_file if log_file is not None else os.getenv('LOG_FILE')
+        console_format = (console_format or os.getenv('LOG_FORMAT', 'console')).lower()
+
+        console = logging.StreamHandler(stream or sys.stdout)
+        console.setFormatter(JSONFormatter() if console_format == 'json' else ConsoleFormatter())
+        handlers = [console]
+        if log_file:
+            directory = os.path.dirname(log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+            file_handler.setFormatter(JSONFormatter())
+            handlers.append(file_handler)
+        for handler in handlers:
+            handler.addFilter(lambda record: not _is_output(record))
+        output_handler = _OutputHandler(output)
+        output_handler.addFilter(_is_output)
+        handlers.append(output_handler)
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(getattr(logging, level, logging.INFO))
+        root.handlers = [logging.handlers.QueueHandler(log_queue)]
+        root.propagate = False
+
+        _queue = log_queue
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background writer"""
+    global _listener
+    with _setup_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
+
+
+def write_output(text: str) -> None:
+    """Write report text to stdout through the listener thread, whatever the log level"""
+    if _listener is None:
+        setup_logging()
+    record = logging.LogRecord(f"{ROOT_LOGGER}.output", logging.INFO, "", 0, text, None, None)
+    record.output = True
+    _queue.put_nowait(record)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return an agent logger, setting up the pipeline on first use"""
+    if _listener is None:
+        setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
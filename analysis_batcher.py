@@ -0,0 +1,192 @@
+"""
+Analysis Batcher: Coalesces pending GPT analysis requests
+Requests arriving within a short window (from any repository or cycle) are
+sent as one structured prompt and the JSON answer is split back per request.
+Identical requests in the same window share a single slot.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Dict, List, Optional, Tuple
+
+from metrics import QUEUE_EVENTS, observe_completion
+from token_budget import TokenBudget, usage_tokens
+from agent_logging import get_logger
+
+log = get_logger("analysis_batcher")
+
+
+class AnalysisBatcher:
+    def __init__(self, client, model: str = "gpt-4o-mini", window: float = 0.5,
+                 max_batch: int = 8, max_tokens_per_item: int = 200,
+                 budget: Optional[TokenBudget] = None):
+        self.client = client
+        self.budget = budget or TokenBudget()
+        self.model = model
+        self.window = window
+        self.max_batch = max_batch
+        self.max_tokens_per_item = max_tokens_per_item
+
+        # key -> (prompt, futures waiting on that key), in arrival order
+        self._pending: Dict[str, Tuple[str, List[Future]]] = {}
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.requests_sent = 0
+        self.items_analyzed = 0
+
+    @classmethod
+    def from_env(cls, client, model: str = "gpt-4o-mini",
+                 budget: Optional[TokenBudget] = None) -> 'AnalysisBatcher':
+        """Build a batcher from ANALYSIS_BATCH_WINDOW / ANALYSIS_BATCH_MAX"""
+        return cls(
+            client,
+            model=model,
+            window=float(os.getenv('ANALYSIS_BATCH_WINDOW', '0.5')),
+            max_batch=int(os.getenv('ANALYSIS_BATCH_MAX', '8')),
+            budget=budget
+        )
+
+    def submit(self, key: str, prompt: str) -> Future:
+        """Queue a prompt; the future resolves to the analysis text, or None on failure"""
+        future: Future = Future()
+        with self._condition:
+            if self._closed:
+                future.set_result(None)
+                return future
+            QUEUE_EVENTS.inc(queue="analysis_batch", event="submitted")
+            if key in self._pending:
+                QUEUE_EVENTS.inc(queue="analysis_batch", event="coalesced")
+                self._pending[key][1].append(future)
+            else:
+                self._pending[key] = (prompt, [future])
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="Analysis-Batcher", daemon=True)
+                self._worker.start()
+            self._condition.notify()
+        return future
+
+    def analyze(self, key: str, prompt: str, timeout: float = 90) -> Optional[str]:
+        """Blocking helper: submit and wait for this request's analysis"""
+        try:
+            return self.submit(key, prompt).result(timeout=timeout)
+        except Exception:
+            return None
+
+    def _take_batch(self) -> List[Tuple[str, str, List[Future]]]:
+        """Wait for work, then collect until the window closes or the batch is full"""
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            if not self._pending:
+                return []
+            deadline = time.monotonic() + self.window
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(timeout=remaining)
+            keys = list(self._pending)[:self.max_batch]
+            return [(key,) + self._pending.pop(key) for key in keys]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            try:
+                results = self._analyze_batch([prompt for _, prompt, _ in batch])
+            except Exception as e:
+                log.warning(f"⚠️ Batched GPT analysis failed: {type(e).__name__}")
+                results = [None] * len(batch)
+            for (_, _, futures), result in zip(batch, results):
+                for future in futures:
+                    try:
+                        future.set_result(result)
+                    except InvalidStateError:
+                        # The caller gave up (e.g. a cancelled asyncio wrapper)
+                        pass
+
+    def _analyze_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        """Send one completion for all prompts and split the answer per prompt"""
+        if len(prompts) == 1:
+            # Over budget: None sends every caller to its local fallback
+            reserved = self.budget.reserve_for(prompts[0], self.max_tokens_per_item, "analysis")
+            if reserved is None:
+                return [None]
+            self.requests_sent += 1
+            self.items_analyzed += 1
+            started = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompts[0]}],
+                    max_tokens=self.max_tokens_per_item,
+                    temperature=0.7,
+                    timeout=30
+                )
+            except Exception:
+                observe_completion("analysis", started, error=True)
+                self.budget.settle(reserved, 0)
+                raise
+            observe_completion("analysis", started, response)
+            self.budget.settle(reserved, usage_tokens(response))
+            return [response.choices[0].message.content]
+
+        sections = "\n".join(f"### Change set {i}\n{prompt.strip()}\n" for i, prompt in enumerate(prompts, 1))
+        batched_prompt = f"""
+You will receive {len(prompts)} independent repository change sets.
+Analyze each one separately, following the instructions inside it.
+Respond with a JSON object whose keys are the change set numbers ("1" to "{len(prompts)}")
+and whose values are the analysis text for that change set.
+
+{sections}"""
+        max_tokens = self.max_tokens_per_item * len(prompts)
+        reserved = self.budget.reserve_for(batched_prompt, max_tokens, "analysis_batch")
+        if reserved is None:
+            return [None] * len(prompts)
+        self.requests_sent += 1
+        self.items_analyzed += len(prompts)
+        started = time.perf_counter()
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": batched_prompt}],
+                max_tokens=max_tokens,
+                temperature=0.7,
+                response_format={"type": "json_object"},
+                timeout=30
+            )
+        except Exception:
+            observe_completion("analysis_batch", started, error=True)
+            self.budget.settle(reserved, 0)
+            raise
+        observe_completion("analysis_batch", started, response)
+        self.budget.settle(reserved, usage_tokens(response))
+        answers = json.loads(response.choices[0].message.content)
+
+        results: List[Optional[str]] = []
+        for i in range(1, len(prompts) + 1):
+            answer = answers.get(str(i))
+            if answer is not None and not isinstance(answer, str):
+                answer = json.dumps(answer, ensure_ascii=False)
+            results.append(answer)
+        return results
+
+    @property
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def stats(self) -> Dict:
+        """Return request/item counters"""
+        return {'requests_sent': self.requests_sent, 'items_analyzed': self.items_analyzed}
+
+    def shutdown(self) -> None:
+        """Stop the worker after it drains pending requests"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
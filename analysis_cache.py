@@ -0,0 +1,129 @@
+"""
+Analysis Cache: Content-addressed GPT result cache
+Shared by Ar-Nab-h and Spoon-tu so identical repository states never hit OpenAI twice
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from metrics import CACHE_REQUESTS
+from agent_logging import get_logger
+
+log = get_logger("analysis_cache")
+
+
+def content_key(message: Dict, kind: str) -> str:
+    """
+    Hash the semantically relevant fields of a monitoring message.
+    Volatile fields such as check_time are ignored, so two cycles that
+    observe the same commits produce the same key. Missing and None values
+    hash alike, so a report dict and its Report model share a key.
+    """
+    relevant = {
+        'kind': kind,
+        'repository': message.get('repository'),
+        'changes_detected': bool(message.get('changes_detected')),
+        'new_commits': message.get('new_commits') or 0,
+        'commits': [
+            [f.get('sha', ''), f.get('message', ''), f.get('author', '')]
+            for f in message.get('modified_files', [])
+        ]
+    }
+    if kind == 'format':
+        # The formatted report embeds the analysis text
+        relevant['analysis'] = message.get('gpt_analysis') or ''
+    encoded = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class AnalysisCache:
+    def __init__(self, max_entries: int = 256, ttl: float = 3600,
+                 persist_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_path = persist_path
+
+        # key -> (expires_at, value), least recently used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.persist_path:
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> 'AnalysisCache':
+        """Build a cache from ANALYSIS_CACHE_SIZE / ANALYSIS_CACHE_TTL / ANALYSIS_CACHE_FILE"""
+        return cls(
+            max_entries=int(os.getenv('ANALYSIS_CACHE_SIZE', '256')),
+            ttl=float(os.getenv('ANALYSIS_CACHE_TTL', '3600')),
+            persist_path=os.getenv('ANALYSIS_CACHE_FILE') or None
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None if missing/expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(result="miss")
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                self.misses += 1
+                CACHE_REQUESTS.inc(result="expired")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc(result="hit")
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        """Store value under key, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.persist_path:
+                self._save()
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters"""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def _load(self) -> None:
+        """Load unexpired entries from the persistence file"""
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, 'r') as f:
+                data = json.load(f)
+            now = time.time()
+            for key, expires_at, value in data.get('entries', []):
+                if expires_at >= now:
+                    self._entries[key] = (expires_at, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        except Exception as e:
+            log.warning(f"⚠️ Failed to load analysis cache: {e}")
+
+    def _save(self) -> None:
+        """Write entries to the persistence file atomically (caller holds the lock)"""
+        try:
+            tmp_path = f"{self.persist_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'entries': [[key, expires_at, value]
+                                for key, (expires_at, value) in self._entries.items()]
+                }, f)
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            log.warning(f"⚠️ Failed to save analysis cache: {e}")
@@ -0,0 +1,188 @@
+"""
+Analysis Pool: Bounded worker pool between detection and analysis
+Monitors hand detected changes to a fixed set of worker threads and go
+straight back to polling. The queue is bounded: with the 'coalesce' policy
+a repository's pending job absorbs newer changes instead of queueing twice,
+and when the queue is full the oldest pending job is evicted: its payload
+goes to the job's fallback (a report without analysis) rather than being lost.
+Jobs of one repository never run concurrently, so its reports stay in order.
+"""
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from metrics import QUEUE_EVENTS
+from agent_logging import fields, get_logger
+
+log = get_logger("analysis_pool")
+
+POLICIES = ('coalesce', 'drop_oldest')
+
+# (payload, handler, merge, fallback)
+Job = Tuple[Dict, Callable[[Dict], None], Optional[Callable[[Dict, Dict], Dict]],
+            Optional[Callable[[Dict], None]]]
+
+
+class AnalysisPool:
+    def __init__(self, workers: int = 2, max_pending: int = 16, policy: str = 'coalesce'):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy '{policy}', expected one of {POLICIES}")
+        self.workers = workers
+        self.max_pending = max(1, max_pending)
+        self.policy = policy
+
+        self._pending: 'OrderedDict[str, Job]' = OrderedDict()
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._active = 0
+        self._running: Set[str] = set()  # keys with a job in flight
+        self._closed = False
+        self._ids = itertools.count()
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+
+    @classmethod
+    def from_env(cls) -> 'AnalysisPool':
+        """Build a pool from ANALYSIS_WORKERS / ANALYSIS_QUEUE_SIZE / ANALYSIS_BACKPRESSURE"""
+        return cls(
+            workers=int(os.getenv('ANALYSIS_WORKERS', '2')),
+            max_pending=int(os.getenv('ANALYSIS_QUEUE_SIZE', '16')),
+            policy=os.getenv('ANALYSIS_BACKPRESSURE', 'coalesce').lower()
+        )
+
+    def submit(self, key: str, payload: Dict, handler: Callable[[Dict], None],
+               merge: Optional[Callable[[Dict, Dict], Dict]] = None,
+               fallback: Optional[Callable[[Dict], None]] = None) -> None:
+        """
+        Queue handler(payload) without blocking. Under 'coalesce', a job still
+        pending for the same key is replaced by merge(old, new), or by the new
+        payload when no merge is given. If the job is evicted from a full
+        queue, fallback(payload) runs instead, on the submitting thread.
+        """
+        if self.workers <= 0:
+            # No pool configured: run inline as before
+            self.submitted += 1
+            self._execute(payload, handler)
+            return
+
+        evicted = None
+        with self._condition:
+            if self._closed:
+                return
+            self.submitted += 1
+            QUEUE_EVENTS.inc(queue="analysis_pool", event="submitted")
+            if self.policy == 'coalesce' and key in self._pending:
+                old_payload = self._pending[key][0]
+                payload = merge(old_payload, payload) if merge else payload
+                self._pending[key] = (payload, handler, merge, fallback)
+                self.coalesced += 1
+                QUEUE_EVENTS.inc(queue="analysis_pool", event="coalesced")
+                return
+
+            if self.policy == 'drop_oldest':
+                key = f"{key}#{next(self._ids)}"
+            if len(self._pending) >= self.max_pending:
+                # Prefer a job that isn't waiting on its own key, so reports stay in order
+                victim = self._next_runnable() or next(iter(self._pending))
+                evicted = (victim, self._pending.pop(victim))
+                self.dropped += 1
+                QUEUE_EVENTS.inc(queue="analysis_pool", event="dropped")
+            self._pending[key] = (payload, handler, merge, fallback)
+            self._start_workers()
+            self._condition.notify()
+
+        if evicted is not None:
+            # Its changes are already baselined: report them unanalyzed rather than lose them
+            evicted_key, (evicted_payload, _, _, evicted_fallback) = evicted
+            log.warning("⚠️ Analysis queue full, reporting oldest pending job without analysis",
+                        extra=fields(repository=self._base_key(evicted_key)))
+            if evicted_fallback is not None:
+                self._execute(evicted_payload, evicted_fallback)
+
+    def _start_workers(self) -> None:
+        """Start worker threads on first use (caller holds the lock)"""
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, name=f"Analysis-Worker-{len(self._threads) + 1}",
+                                      daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    @staticmethod
+    def _base_key(queue_key: str) -> str:
+        """The submitted key of a queue entry (drop_oldest makes entries unique)"""
+        return queue_key.split('#')[0]
+
+    def _next_runnable(self) -> Optional[str]:
+        """Oldest pending entry whose key has no job in flight (caller holds the lock)"""
+        return next((k for k in self._pending if self._base_key(k) not in self._running), None)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                queue_key = self._next_runnable()
+                while queue_key is None and (self._pending or not self._closed):
+                    self._condition.wait()
+                    queue_key = self._next_runnable()
+                if queue_key is None:
+                    return
+                payload, handler, _, _ = self._pending.pop(queue_key)
+                key = self._base_key(queue_key)
+                self._running.add(key)
+                self._active += 1
+            try:
+                self._execute(payload, handler)
+            finally:
+                with self._condition:
+                    self._active -= 1
+                    self._running.discard(key)
+                    self._condition.notify_all()
+
+    def _execute(self, payload: Dict, handler: Callable[[Dict], None]) -> None:
+        try:
+            handler(payload)
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            log.error(f"❌ Analysis job failed: {e}", exc_info=True)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued job has finished; returns False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and self._active == 0, timeout=timeout)
+
+    def busy(self, key: str) -> bool:
+        """True while a job for key is queued or running"""
+        with self._condition:
+            return key in self._running or any(self._base_key(k) == key for k in self._pending)
+
+    @property
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def stats(self) -> Dict:
+        """Return queue counters"""
+        with self._condition:
+            return {
+                'pending': len(self._pending),
+                'active': self._active,
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'dropped': self.dropped,
+                'completed': self.completed,
+                'failed': self.failed,
+            }
+
+    def shutdown(self, wait: bool = False, timeout: Optional[float] = None) -> None:
+        """Stop accepting jobs; workers finish what is queued, optionally waited for"""
+        if wait:
+            self.join(timeout=timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -5,119 +5,468 @@ Uses GPT 4o mini to analyze code changes and commit details
 """
 import threading
 import time
-import requests
 import hashlib
-import json
 import os
 from datetime import datetime
-from typing import Dict, List, Optional
-from openai import OpenAI
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+from openai_client import shared_client
+from github_session import GitHubSession
+from analysis_cache import content_key
+from repo_registry import RepoConfig, load_registry
+from adaptive_poll import AdaptivePollPolicy, RateLimitState
+from bounded_json import BoundedJSONReader
+from baseline_store import BaselineStore
+from git_mirror import GitMirror
+from llm_stream import TokenStream, stream_completion
+from token_budget import estimate_tokens, fit_lines, truncate_to_tokens
+from metrics import CHANGES_DETECTED, CYCLE_DURATION, GITHUB_RATE_REMAINING, POLL_INTERVAL
+from agent_logging import fields, get_logger
+
+log = get_logger("ar_nab_h")
 
 
 class ArNabH:
-    def __init__(self, api_key: str, parent_agent):
+    def __init__(self, api_key: str, parent_agent, session: Optional[GitHubSession] = None,
+                 repo: Optional[RepoConfig] = None, announce: bool = True,
+                 rate_state: Optional[RateLimitState] = None,
+                 store: Optional[BaselineStore] = None):
         self.api_key = api_key
-        self.client = OpenAI(api_key=api_key)
+        self.client = shared_client(api_key)
         self.model = "gpt-4o-mini"
         self.parent_agent = parent_agent
         
-        # GitHub repository configuration
-        self.repo_owner = "SChat9994u"
-        self.repo_name = "PairProgramming"
-        self.api_base_url = f"https://api.github.com/repos/{self.repo_owner}/{self.repo_name}"
+        # GitHub repository configuration (first registry entry by default)
+        self.repo = repo or load_registry()[0]
+        self.repo_owner = self.repo.owner
+        self.repo_name = self.repo.name
+        api_root = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+        self.api_base_url = f"{api_root}/repos/{self.repo_owner}/{self.repo_name}"
+        
+        # Shared keep-alive HTTP session (pooled connections, retries)
+        self.session = session or GitHubSession()
         
         # Baseline tracking
         self.baseline_hash: Optional[str] = None
         self.baseline_commits: List[Dict] = []
         self.last_check_time = None
-        self.baseline_file = "baseline.json"
+        self.baseline_file = self.repo.baseline_file or "baseline.json"  # legacy, migrated on load
+        self.store = store or BaselineStore.from_env()
+        # Batch runs hold baseline writes until the report has been delivered
+        self.defer_saves = False
+        self._deferred_save: Optional[bool] = None  # pending save's reset flag
+        
+        # Conditional request validators (ETag / Last-Modified) per endpoint
+        # and the last body received for each, so a 304 can be served locally
+        self.validators: Dict[str, Dict[str, str]] = {}
+        self._cached_bodies: Dict[str, object] = {}
+        
+        # Incremental diffing: index of every SHA already seen (insertion
+        # ordered, oldest trimmed first) and the newest head reported
+        self.sha_index: Dict[str, None] = {}
+        self.head_sha: Optional[str] = None
+        self.pending_commits: List[Dict] = []
+        self._unsaved_shas: List[str] = []
+        self.page_size = 100
+        self.max_pages = 10
+        self.max_index_size = 10000
+        self.baseline_size = 5
+        
+        # Compare-endpoint mode: per-file details for each batch of new commits
+        self.compare_mode = os.getenv('AR_NAB_H_COMPARE_MODE', 'true').lower() == 'true'
+        self.max_files = 50
+        self.patch_limit = 1500  # characters kept per file patch
+        self.max_compare_bytes = 20 * 1024 * 1024
+        
+        # Git mirror mode: read commits and diffs from a local bare mirror,
+        # kept current with git fetch, instead of the REST API
+        use_mirror = os.getenv('AR_NAB_H_SOURCE', 'rest').lower() == 'git'
+        self.mirror = GitMirror.for_repo(self.repo) if use_mirror else None
         
         # Load existing baseline if it exists
         self._load_baseline()
         
         # Configuration
-        self.check_interval = 10  # seconds
+        self.check_interval = self.repo.interval  # base interval, seconds
         self.is_running = False
         
-        print(f"\n🔍 {datetime.now().strftime('%H:%M:%S')} - Child Agent 'Ar-Nab-h' initialized")
-        print(f"   Repository: {self.repo_owner}/{self.repo_name}")
-        print(f"   Check Interval: {self.check_interval} seconds")
+        # Adapts the interval to the GitHub rate limit, errors and activity;
+        # rate_state is shared by all monitors using the same credentials
+        self.poll_policy = AdaptivePollPolicy(self.check_interval, rate_state)
+        POLL_INTERVAL.set_function(lambda: self.poll_policy.effective_interval, repository=self.repo.full_name)
+        GITHUB_RATE_REMAINING.set_function(lambda: self.poll_policy.rate_state.remaining)
+        
+        if not announce:
+            return
+        log.info("🔍 Child Agent 'Ar-Nab-h' initialized",
+                 extra=fields(repository=self.repo.full_name, check_interval=self.check_interval))
+    
+    @property
+    def effective_interval(self) -> float:
+        """Current adaptive poll interval in seconds"""
+        return self.poll_policy.effective_interval
     
     def _load_baseline(self):
-        """Load baseline from file if it exists"""
-        if os.path.exists(self.baseline_file):
-            try:
-                with open(self.baseline_file, 'r') as f:
-                    data = json.load(f)
-                    self.baseline_hash = data.get('hash')
-                    self.baseline_commits = data.get('commits', [])
-                    print(f"   ✅ Baseline loaded from {self.baseline_file}")
-            except Exception as e:
-                print(f"   ⚠️ Failed to load baseline: {e}")
-    
-    def _save_baseline(self):
-        """Save current baseline to file"""
+        """Load baseline from the store, migrating a legacy baseline file once"""
+        repo_key = self.repo.full_name
         try:
-            with open(self.baseline_file, 'w') as f:
-                json.dump({
-                    'hash': self.baseline_hash,
-                    'commits': self.baseline_commits,
-                    'timestamp': datetime.now().isoformat()
-                }, f, indent=2)
+            data = self.store.load(repo_key, self.max_index_size)
+            if data is None and self.store.import_legacy(repo_key, self.baseline_file):
+                log.info("✅ Migrated legacy baseline into the store",
+                         extra=fields(repository=repo_key, file=self.baseline_file, store=self.store.path))
+                data = self.store.load(repo_key, self.max_index_size)
+            if data is None:
+                return
+            self.baseline_hash = data['hash']
+            self.baseline_commits = data['commits']
+            self.validators = data['validators']
+            self._index_shas(data['known_shas'])
+            self._unsaved_shas = []
+            self.head_sha = data['head_sha']
+            log.info("✅ Baseline loaded", extra=fields(repository=repo_key, store=self.store.path))
         except Exception as e:
-            print(f"⚠️ Failed to save baseline: {e}")
+            log.warning(f"⚠️ Failed to load baseline: {e}", extra=fields(repository=repo_key))
+    
+    def _save_baseline(self, reset: bool = False):
+        """Atomically save the baseline and append newly indexed SHAs"""
+        if self.defer_saves:
+            self._deferred_save = bool(self._deferred_save) or reset
+            return
+        self._write_baseline(reset)
+    
+    def flush_baseline(self) -> None:
+        """Write a save held back by defer_saves"""
+        if self._deferred_save is None:
+            return
+        reset, self._deferred_save = self._deferred_save, None
+        self._write_baseline(reset)
+    
+    def _write_baseline(self, reset: bool = False):
+        try:
+            self.store.save(
+                self.repo.full_name,
+                self.baseline_hash,
+                self.head_sha,
+                self.validators,
+                self.baseline_commits,
+                new_shas=self._unsaved_shas,
+                reset=reset,
+                max_shas=self.max_index_size
+            )
+            self._unsaved_shas = []
+        except Exception as e:
+            log.warning(f"⚠️ Failed to save baseline: {e}", extra=fields(repository=self.repo.full_name))
+    
+    def _cache_key(self, url: str, params: Optional[Dict] = None) -> str:
+        """Build the validator cache key for an endpoint and its query params"""
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted(params.items()))}"
+    
+    def _index_shas(self, shas: List[str]) -> None:
+        """Add SHAs (oldest first) to the index, trimming the oldest beyond max_index_size"""
+        for sha in shas:
+            if sha and sha not in self.sha_index:
+                self.sha_index[sha] = None
+                self._unsaved_shas.append(sha)
+        while len(self.sha_index) > self.max_index_size:
+            del self.sha_index[next(iter(self.sha_index))]
+    
+    def _validator_headers(self, key: str, require_body: bool = True) -> Dict[str, str]:
+        """Conditional request headers for a cache key"""
+        validators = self.validators.get(key, {})
+        headers = {}
+        # Only send validators when we still hold the body they describe,
+        # unless the caller treats a 304 as "nothing new" without a body
+        if key in self._cached_bodies or not require_body:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+    
+    def _remember_response(self, key: str, response_headers, body: object, keep_body: bool = True) -> None:
+        """Store the validators and body of a 200 response"""
+        new_validators = {}
+        if response_headers.get('ETag'):
+            new_validators['etag'] = response_headers['ETag']
+        if response_headers.get('Last-Modified'):
+            new_validators['last_modified'] = response_headers['Last-Modified']
+        if new_validators:
+            self.validators[key] = new_validators
+        else:
+            self.validators.pop(key, None)
+        if keep_body:
+            self._cached_bodies[key] = body
+    
+    def _get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None, **kwargs):
+        """GET through the shared session, feeding the adaptive poll policy"""
+        try:
+            response = self.session.get(url, params=params, headers=headers, **kwargs)
+        except Exception:
+            self.poll_policy.observe_failure()
+            raise
+        self.poll_policy.observe_response(response.status_code, response.headers)
+        return response
+    
+    def _conditional_get(self, url: str, params: Optional[Dict] = None,
+                         keep_body: bool = True) -> Tuple[object, bool]:
+        """
+        GET an endpoint with If-None-Match / If-Modified-Since validators.
+        Returns (body, modified); on 304 the previously received body is
+        returned with modified=False and the response is never parsed.
+        With keep_body=False no body is retained and a 304 returns None.
+        """
+        key = self._cache_key(url, params)
+        response = self._get(url, params=params, headers=self._validator_headers(key, require_body=keep_body))
+        if response.status_code == 304:
+            return self._cached_bodies.get(key), False
+        
+        response.raise_for_status()
+        body = response.json()
+        self._remember_response(key, response.headers, body, keep_body=keep_body)
+        return body, True
     
     def get_repo_data(self) -> Dict:
         """Fetch repository data from GitHub API"""
         try:
-            response = requests.get(f"{self.api_base_url}", timeout=10)
-            response.raise_for_status()
-            return response.json()
+            if self.mirror:
+                self.mirror.sync()
+                return self.mirror.repo_data()
+            data, _ = self._conditional_get(self.api_base_url)
+            return data
         except Exception as e:
-            print(f"❌ Error fetching repo data: {e}")
+            log.error(f"❌ Error fetching repo data: {e}", extra=fields(repository=self.repo.full_name))
             return {}
     
-    def get_recent_commits(self, limit: int = 5) -> List[Dict]:
-        """Fetch recent commits from the repository"""
+    def fetch_commits(self, limit: int = 5) -> Tuple[List[Dict], bool]:
+        """Fetch recent commits, returning (commits, modified) so callers can skip unchanged pages"""
         try:
-            response = requests.get(
+            if self.mirror:
+                return self.mirror.log(self.mirror.head_sha(), limit=limit), True
+            return self._conditional_get(
                 f"{self.api_base_url}/commits",
-                params={"per_page": limit},
-                timeout=10
+                params={"per_page": limit}
             )
-            response.raise_for_status()
-            return response.json()
         except Exception as e:
-            print(f"❌ Error fetching commits: {e}")
-            return []
+            log.error(f"❌ Error fetching commits: {e}", extra=fields(repository=self.repo.full_name))
+            return [], True
+    
+    def get_recent_commits(self, limit: int = 5) -> List[Dict]:
+        """Fetch recent commits from the repository"""
+        commits, _ = self.fetch_commits(limit)
+        return commits
+    
+    def _commit_page_params(self, page: int) -> Dict:
+        """Query parameters for one page of the new-commit range"""
+        # No since= filter: it goes by commit date, which misses merged, rebased
+        # and clock-skewed commits; the SHA index decides what is new
+        params = {"per_page": self.page_size}
+        if page > 1:
+            params["page"] = page
+        return params
+    
+    def _scan_commit_page(self, page_commits: List[Dict]) -> Tuple[List[Dict], bool]:
+        """Return the unseen commits of a page and whether the known range was reached"""
+        # The listing is date ordered, so commits of a merged branch can sit below
+        # known ones: filter the whole page, and stop at the previous head or at a
+        # page with nothing new (after a force push the old head may be gone)
+        new_commits = [c for c in page_commits if c.get('sha') not in self.sha_index]
+        reached_head = any(c.get('sha') == self.head_sha for c in page_commits)
+        reached_known = reached_head or not new_commits or len(page_commits) < self.page_size
+        return new_commits, reached_known
+    
+    def _forget_commit_validators(self) -> None:
+        """Drop validators for the commit range, e.g. after a new baseline or a failed fetch"""
+        prefix = f"{self.api_base_url}/commits?"
+        for key in [k for k in self.validators if k.startswith(prefix)]:
+            del self.validators[key]
+    
+    def fetch_new_commits(self) -> Tuple[Optional[List[Dict]], bool]:
+        """
+        Fetch commits missing from the SHA index, newest first, paginating until the known range.
+        Returns (new_commits, modified); new_commits is None if the fetch failed.
+        """
+        if self.mirror:
+            return self.fetch_mirror_commits()
+        url = f"{self.api_base_url}/commits"
+        new_commits: List[Dict] = []
+        try:
+            for page in range(1, self.max_pages + 1):
+                params = self._commit_page_params(page)
+                if page == 1:
+                    # Only the first page is conditional: a 304 means nothing new
+                    page_commits, modified = self._conditional_get(url, params, keep_body=False)
+                    if not modified:
+                        return [], False
+                else:
+                    response = self._get(url, params=params)
+                    response.raise_for_status()
+                    page_commits = response.json()
+                
+                found, reached_known = self._scan_commit_page(page_commits)
+                new_commits.extend(found)
+                if reached_known:
+                    break
+            else:
+                log.warning(f"⚠️ More than {self.page_size * self.max_pages} new commits, reporting the newest",
+                            extra=fields(repository=self.repo.full_name))
+            return new_commits, True
+        except Exception as e:
+            # Retry the whole range next cycle rather than skipping part of it
+            self._forget_commit_validators()
+            log.error(f"❌ Error fetching commits: {e}", extra=fields(repository=self.repo.full_name))
+            return None, True
+    
+    def fetch_mirror_commits(self) -> Tuple[Optional[List[Dict]], bool]:
+        """Fetch the git mirror and list commits past the known head, without REST calls"""
+        try:
+            self.mirror.sync()
+            head = self.mirror.head_sha()
+            if head is None or head == self.head_sha:
+                return [], False
+            # After a force push the old head may be gone; fall back to the SHA index
+            known = self.head_sha if self.head_sha and self.mirror.has_commit(self.head_sha) else None
+            commits = self.mirror.log(head, exclude=known, limit=self.page_size * self.max_pages)
+            # A successful fetch clears any failure backoff
+            self.poll_policy.observe_response(200, {})
+            return [c for c in commits if c.get('sha') not in self.sha_index], True
+        except Exception as e:
+            self.poll_policy.observe_failure()
+            log.error(f"❌ Error fetching git mirror: {e}", extra=fields(repository=self.repo.full_name))
+            return None, True
+    
+    def _compare_reader(self) -> BoundedJSONReader:
+        """Streaming reader that truncates patches as the compare body arrives"""
+        return BoundedJSONReader(
+            default_limit=2000,
+            key_limits={'patch': self.patch_limit},
+            max_bytes=self.max_compare_bytes
+        )
+    
+    def _summarize_compare(self, data: Dict) -> Dict:
+        """Reduce a compare response to changed files and aggregate stats"""
+        files = data.get('files', [])
+        changed_files = [
+            {
+                'filename': f.get('filename', ''),
+                'status': f.get('status', ''),
+                'additions': f.get('additions', 0),
+                'deletions': f.get('deletions', 0),
+                'patch': f.get('patch', '')
+            }
+            for f in files[:self.max_files]
+        ]
+        return {
+            'changed_files': changed_files,
+            'diff_stats': {
+                'files_changed': len(files),
+                'additions': sum(f.get('additions', 0) for f in files),
+                'deletions': sum(f.get('deletions', 0) for f in files),
+                'total_commits': data.get('total_commits', 0)
+            }
+        }
+    
+    def fetch_compare(self, base: str, head: str) -> Optional[Dict]:
+        """Fetch changed files for base...head in one streamed, size-bounded request"""
+        url = f"{self.api_base_url}/compare/{base}...{head}"
+        try:
+            if self.mirror:
+                return self.mirror.compare(base, head, self.max_files, self.patch_limit)
+            response = self._get(url, stream=True)
+            with response:
+                response.raise_for_status()
+                reader = self._compare_reader()
+                for chunk in response.iter_content(chunk_size=65536):
+                    reader.feed(chunk)
+            return self._summarize_compare(reader.result())
+        except Exception as e:
+            log.warning(f"⚠️ Compare fetch failed: {type(e).__name__}, reporting commit summaries only",
+                        extra=fields(repository=self.repo.full_name))
+            return None
+    
+    def attach_file_details(self, changes: Dict, details: Optional[Dict]) -> Dict:
+        """Merge compare results into a change report"""
+        if details:
+            changes.update(details)
+        return changes
+    
+    def compare_range(self) -> Optional[Tuple[str, str]]:
+        """Return (base, head) for the pending commits, if compare mode applies"""
+        if not self.compare_mode or not self.pending_commits or not self.head_sha:
+            return None
+        return self.head_sha, self.pending_commits[0].get('sha')
+    
+    def request_cost(self, baselined: bool) -> int:
+        """GitHub REST requests one cycle spends (a baseline fetches repo + commits)"""
+        if self.mirror:
+            return 0
+        return 1 if baselined else 2
     
     def create_baseline(self) -> bool:
         """Create initial baseline of repository state"""
-        print(f"\n📊 {datetime.now().strftime('%H:%M:%S')} - Creating baseline snapshot...")
+        log.info("📊 Creating baseline snapshot...", extra=fields(repository=self.repo.full_name))
         
         repo_data = self.get_repo_data()
-        commits = self.get_recent_commits()
-        
+        commits = self.get_recent_commits(self.page_size)
+        return self.set_baseline(repo_data, commits)
+    
+    def ensure_baseline(self) -> bool:
+        """Resume from a persisted baseline head, or create a new baseline"""
+        if self.head_sha and self.sha_index:
+            log.info(f"✅ Resuming from baseline head {self.head_sha[:7]}",
+                     extra=fields(repository=self.repo.full_name, known_commits=len(self.sha_index)))
+            return True
+        return self.create_baseline()
+    
+    def set_baseline(self, repo_data: Dict, commits: List[Dict]) -> bool:
+        """Record a baseline from already-fetched repository data and commits"""
         if not repo_data or not commits:
-            print("❌ Failed to create baseline")
+            log.error("❌ Failed to create baseline", extra=fields(repository=self.repo.full_name))
             return False
         
         # Create a hash of current state
         state_string = f"{repo_data.get('updated_at', '')}{len(commits)}{commits[0].get('sha', '') if commits else ''}"
         self.baseline_hash = hashlib.sha256(state_string.encode()).hexdigest()
-        self.baseline_commits = commits
+        self.baseline_commits = commits[:self.baseline_size]
         self.last_check_time = datetime.now()
+        self.sha_index = {}
+        self._unsaved_shas = []
+        self._index_shas([c.get('sha') for c in reversed(commits)])
+        self._move_cursor(commits[0])
+        # A new index starts from a full commit list, not a 304
+        self._forget_commit_validators()
         
-        # Save baseline to file
-        self._save_baseline()
-        print(f"✅ Baseline created: {self.baseline_hash[:16]}...")
+        # Replace the stored baseline and SHA history in one transaction
+        self._save_baseline(reset=True)
+        log.info(f"✅ Baseline created: {self.baseline_hash[:16]}...", extra=fields(repository=self.repo.full_name))
         return True
     
     def detect_changes(self) -> Dict:
         """Check for changes in the repository"""
-        current_commits = self.get_recent_commits()
+        new_commits, modified = self.fetch_new_commits()
+        changes = self.diff_commits(new_commits, modified)
         
-        if not current_commits:
+        compare_range = self.compare_range()
+        if compare_range:
+            self.attach_file_details(changes, self.fetch_compare(*compare_range))
+        return changes
+    
+    def diff_commits(self, current_commits: Optional[List[Dict]], modified: bool = True) -> Dict:
+        """Compare fetched commits against the SHA index and build the report"""
+        self.pending_commits = []
+        if not modified:
+            # 304 Not Modified: the commit list is identical, nothing to diff
+            return {
+                'repository': f"{self.repo_owner}/{self.repo_name}",
+                'changes_detected': False,
+                'check_time': datetime.now().isoformat(),
+                'new_commits': 0,
+                'modified_files': [],
+                'not_modified': True
+            }
+        
+        if current_commits is None:
             return {
                 'repository': f"{self.repo_owner}/{self.repo_name}",
                 'changes_detected': False,
@@ -126,21 +475,19 @@ class ArNabH:
             }
         
         # Create current state hash
-        state_string = f"{datetime.now().isoformat()[:10]}{len(current_commits)}{current_commits[0].get('sha', '')}"
+        head_sha = current_commits[0].get('sha', '') if current_commits else (self.head_sha or '')
+        state_string = f"{datetime.now().isoformat()[:10]}{len(current_commits)}{head_sha}"
         current_hash = hashlib.sha256(state_string.encode()).hexdigest()
         
-        # Check if commits have changed
+        # Check if commits have changed: one set lookup per commit
         changes_detected = False
         modified_files = []
         new_commits = []
         
-        if self.baseline_commits:
-            baseline_shas = [c.get('sha') for c in self.baseline_commits]
-            current_shas = [c.get('sha') for c in current_commits]
-            
-            # Find new commits
-            new_commits = [c for c in current_commits if c.get('sha') not in baseline_shas]
+        if self.sha_index:
+            new_commits = [c for c in current_commits if c.get('sha') not in self.sha_index]
             changes_detected = len(new_commits) > 0
+            self.pending_commits = new_commits
         
         # Extract modified files from new commits
         if new_commits:
@@ -167,67 +514,199 @@ class ArNabH:
         if not changes.get('changes_detected'):
             return "No changes detected in the repository."
         
-        try:
-            prompt = f"""
+        # Identical commit sets are only ever analyzed once
+        cache = self.parent_agent.analysis_cache
+        cache_key = content_key(changes, 'analysis')
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Batched with concurrent requests from other repositories/cycles
+        analysis = self.parent_agent.analysis_batcher.analyze(cache_key, self.build_analysis_prompt(changes))
+        if analysis is None:
+            # Fallback: GPT failed or the token budget is exhausted
+            log.warning("⚠️ GPT analysis unavailable, using fallback", extra=fields(repository=self.repo.full_name))
+            return self.fallback_analysis(changes)
+        
+        cache.put(cache_key, analysis)
+        return analysis
+    
+    def stream_analysis_with_gpt(self, changes: Dict) -> Optional[TokenStream]:
+        """Start a streamed GPT analysis; returns None when a cached or trivial answer exists"""
+        if not changes.get('changes_detected'):
+            return None
+        
+        cache = self.parent_agent.analysis_cache
+        cache_key = content_key(changes, 'analysis')
+        if cache.get(cache_key) is not None:
+            return None
+        
+        def complete(text: str) -> None:
+            cache.put(cache_key, text)
+            changes['gpt_analysis'] = text
+        
+        # Streams bypass the batcher: one completion per change set, tokens as they come
+        return stream_completion(
+            self.parent_agent.client,
+            self.parent_agent.model,
+            self.build_analysis_prompt(changes),
+            max_tokens=200,
+            label=self.repo.full_name,
+            operation="analysis_stream",
+            on_complete=complete,
+            fallback=lambda: self.fallback_analysis(changes),
+            budget=self.parent_agent.token_budget
+        )
+    
+    def build_analysis_prompt(self, changes: Dict) -> str:
+        """Build the GPT prompt describing the detected changes, compacted to the token budget"""
+        max_prompt_tokens = self.parent_agent.token_budget.max_prompt_tokens
+        # Commits get half the prompt; file changes and patches the rest
+        commit_lines = fit_lines(
+            [f"  • {f.get('message', 'N/A')} by {f.get('author', 'Unknown')} at {f.get('date', 'N/A')}"
+             for f in changes.get('modified_files', [])],
+            max_prompt_tokens // 2, noun="commits"
+        )
+        commits = chr(10).join(commit_lines)
+        file_changes = truncate_to_tokens(self._describe_file_changes(changes),
+                                          max_prompt_tokens - estimate_tokens(commits))
+        return f"""
 Analyze the following GitHub repository changes:
 - Repository: {changes.get('repository')}
 - Changes Detected: Yes
 - Number of New Commits: {changes.get('new_commits', 0)}
 - Modified Files/Commits:
-{chr(10).join([f"  • {f.get('message', 'N/A')} by {f.get('author', 'Unknown')} at {f.get('date', 'N/A')}" for f in changes.get('modified_files', [])])}
-
+{commits}
+{file_changes}
 Provide a brief analysis of what changed and its potential impact.
 """
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=200,
-                temperature=0.7,
-                timeout=30
-            )
-            
-            return response.choices[0].message.content
-        except Exception as e:
-            # Fallback: Return a simple analysis
-            print(f"   ⚠️  GPT analysis failed: {type(e).__name__}, using fallback")
-            return f"Repository has {changes.get('new_commits', 0)} new commit(s). Changes detected in {changes.get('repository', 'repository')}."
+    
+    def _describe_file_changes(self, changes: Dict, max_patches: int = 5) -> str:
+        """Prompt section listing changed files, with the first few patches"""
+        changed_files = changes.get('changed_files')
+        if not changed_files:
+            return ""
+        stats = changes.get('diff_stats', {})
+        lines = [f"- Changed Files ({stats.get('files_changed', len(changed_files))}, "
+                 f"+{stats.get('additions', 0)}/-{stats.get('deletions', 0)}):"]
+        for f in changed_files:
+            lines.append(f"  • {f['filename']} ({f['status']}, +{f['additions']}/-{f['deletions']})")
+        for f in changed_files[:max_patches]:
+            if f.get('patch'):
+                lines.append(f"\nPatch for {f['filename']}:\n{f['patch']}")
+        return "\n".join(lines) + "\n"
+    
+    def fallback_analysis(self, changes: Dict) -> str:
+        """Simple local analysis used when GPT is unavailable"""
+        return f"Repository has {changes.get('new_commits', 0)} new commit(s). Changes detected in {changes.get('repository', 'repository')}."
+    
+    def check(self) -> Dict:
+        """Detect changes and advance the baseline; returns the (unanalyzed) report"""
+        with CYCLE_DURATION.time(agent="ar_nab_h"):
+            changes = self.detect_changes()
+        outcome = ("changed" if changes.get('changes_detected') else
+                   "not_modified" if changes.get('not_modified') else
+                   "error" if changes.get('reason') else "unchanged")
+        CHANGES_DETECTED.inc(repository=self.repo.full_name, outcome=outcome)
+        self.poll_policy.observe_activity(changes.get('changes_detected'))
+        
+        # Advance the baseline now, so the next poll starts here while analysis is pending
+        if changes.get('changes_detected'):
+            self.update_baseline(self.pending_commits)
+        elif not changes.get('not_modified') and not changes.get('reason'):
+            # A 200 without new commits carries fresh validators worth keeping
+            self._save_baseline()
+        return changes
     
     def check_and_report(self) -> None:
-        """Check for changes and report to parent agent"""
-        changes = self.detect_changes()
+        """Check for changes and hand them to the analysis pool"""
+        changes = self.check()
+        pool = self.parent_agent.analysis_pool
+        if not changes.get('changes_detected'):
+            # Quiet cycles (unchanged, 304) only feed the metrics; failures are still
+            # reported, unless a change report for this repository is still on its way
+            if changes.get('reason') and not pool.busy(self.repo.full_name):
+                self.analyze_and_report(changes)
+            return
         
-        # Add GPT analysis
-        analysis = self.analyze_changes_with_gpt(changes)
-        changes['gpt_analysis'] = analysis
+        # GPT latency is absorbed by the pool, not by the polling cadence
+        pool.submit(
+            self.repo.full_name, changes, self.analyze_and_report,
+            merge=self.merge_changes, fallback=self.report_without_analysis
+        )
+    
+    def analyze_and_report(self, changes: Dict) -> None:
+        """Add GPT analysis to detected changes and report to parent agent"""
+        # A streamed analysis is filled in while the report is displayed
+        stream = self.stream_analysis_with_gpt(changes) if self.parent_agent.streaming else None
+        if stream is not None:
+            changes['gpt_analysis'] = ""
+            changes['analysis_stream'] = stream
+        else:
+            changes['gpt_analysis'] = self.analyze_changes_with_gpt(changes)
         
         # Send to parent agent
         self.parent_agent.process_ar_nab_h_message(changes)
+    
+    def report_without_analysis(self, changes: Dict) -> None:
+        """Report detected changes with the local analysis, e.g. when the analysis queue is full"""
+        changes['gpt_analysis'] = self.fallback_analysis(changes)
+        self.parent_agent.process_ar_nab_h_message(changes)
+    
+    @staticmethod
+    def merge_changes(older: Dict, newer: Dict) -> Dict:
+        """Coalesce two pending change reports of one repository into one"""
+        merged = dict(newer)
+        merged['modified_files'] = newer.get('modified_files', []) + older.get('modified_files', [])
+        merged['new_commits'] = newer.get('new_commits', 0) + older.get('new_commits', 0)
         
-        # Update baseline if changes detected
-        if changes.get('changes_detected'):
-            self.baseline_commits = self.get_recent_commits()
-            print(f"   📝 Baseline updated with new commits")
+        if older.get('changed_files') or newer.get('changed_files'):
+            files = {f.get('filename'): f for f in older.get('changed_files', [])}
+            files.update({f.get('filename'): f for f in newer.get('changed_files', [])})
+            merged['changed_files'] = list(files.values())
+            merged['diff_stats'] = {
+                'files_changed': len(files),
+                'additions': sum(f.get('additions', 0) for f in files.values()),
+                'deletions': sum(f.get('deletions', 0) for f in files.values()),
+            }
+        return merged
+    
+    def _move_cursor(self, head_commit: Dict) -> None:
+        """Point the head cursor at the newest known commit"""
+        # The commit-list URL no longer changes with the cursor, so its validators
+        # stay valid: the next poll is a 304 until something new is pushed
+        self.head_sha = head_commit.get('sha')
+    
+    def update_baseline(self, new_commits: List[Dict]) -> None:
+        """Fold newly reported commits (newest first) into the index and cursor"""
+        if not new_commits:
+            return
+        self._index_shas([c.get('sha') for c in reversed(new_commits)])
+        self._move_cursor(new_commits[0])
+        self.baseline_commits = (new_commits + self.baseline_commits)[:self.baseline_size]
+        self.pending_commits = []
+        self._save_baseline()
+        log.info(f"📝 Baseline updated with {len(new_commits)} new commit(s)",
+                 extra=fields(repository=self.repo.full_name))
     
     def run(self) -> None:
         """Main loop for Ar-Nab-h agent"""
         self.is_running = True
         
-        if not self.create_baseline():
-            print("❌ Failed to create baseline. Exiting Ar-Nab-h agent.")
+        if not self.ensure_baseline():
+            log.error("❌ Failed to create baseline. Exiting Ar-Nab-h agent.")
             return
         
-        print(f"\n✅ Ar-Nab-h agent started - monitoring every {self.check_interval} seconds")
-        print("=" * 80)
+        log.info(f"✅ Ar-Nab-h agent started - monitoring every {self.check_interval:g} seconds")
         
         try:
             while self.is_running:
                 self.check_and_report()
-                time.sleep(self.check_interval)
+                time.sleep(self.effective_interval)
         except KeyboardInterrupt:
             self.shutdown()
     
     def shutdown(self) -> None:
         """Gracefully shutdown the agent"""
         self.is_running = False
-        print(f"\n🛑 {datetime.now().strftime('%H:%M:%S')} - Ar-Nab-h agent shutting down...")
+        log.info("🛑 Ar-Nab-h agent shutting down...", extra=fields(**self.session.stats()))
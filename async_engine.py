@@ -0,0 +1,372 @@
+"""
+Async Engine: asyncio runtime for the monitor/format pipeline
+Runs Furious-NYL, Ar-Nab-h and Spoon-tu as coroutines on a single event loop,
+using httpx for GitHub and AsyncOpenAI for analysis and formatting.
+Repository state, diffing, caching and console output are shared with the
+threaded agents; only the I/O is replaced.
+"""
+import asyncio
+import functools
+import os
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI
+
+from adaptive_poll import RateLimitState
+from analysis_cache import content_key
+from ar_nab_h import ArNabH
+from baseline_store import BaselineStore
+from furious_nyl import FuriousNYL
+from github_session import GitHubSession
+from agent_logging import fields, get_logger
+from metrics import (CHANGES_DETECTED, CYCLE_DURATION, GITHUB_LATENCY, GITHUB_REQUESTS,
+                     observe_completion)
+from repo_registry import RepoConfig, load_registry
+from repo_scheduler import RateBudget
+from spoon_tu import SpoonTu
+from token_budget import usage_tokens
+
+log = get_logger("async_engine")
+
+
+async def to_thread(func, *args):
+    """Run blocking file/SQLite I/O on the default executor (asyncio.to_thread, Python 3.8 compatible)"""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+
+class AsyncFuriousNYL:
+    def __init__(self, agent: FuriousNYL):
+        self.agent = agent
+        self.analysis_cache = agent.analysis_cache
+        self._condition = asyncio.Condition()
+
+    async def process_ar_nab_h_message(self, message: Dict) -> None:
+        """Store the report and wake every waiting coroutine"""
+        self.agent.process_ar_nab_h_message(message)
+        async with self._condition:
+            self._condition.notify_all()
+
+    async def wait_for_ar_nab_h_messages(self, cursor: int = 0) -> Tuple[int, List[Dict]]:
+        """Wait until reports after cursor exist; returns (new cursor, messages)"""
+        reports = self.agent.reports
+        async with self._condition:
+            await self._condition.wait_for(lambda: reports.sequence > cursor)
+        return self.agent.read_ar_nab_h_messages(cursor)
+
+
+class AsyncArNabH:
+    def __init__(self, monitor: ArNabH, http: httpx.AsyncClient, llm: AsyncOpenAI,
+                 parent: AsyncFuriousNYL, budget: RateBudget, slots: asyncio.Semaphore):
+        self.monitor = monitor
+        self.http = http
+        self.llm = llm
+        self.parent = parent
+        self.budget = budget
+        self.slots = slots
+
+    async def _get(self, url: str, params: Optional[Dict] = None,
+                   headers: Optional[Dict] = None) -> httpx.Response:
+        """GET through the async client, feeding the adaptive poll policy"""
+        started = time.perf_counter()
+        try:
+            response = await self.http.get(url, params=params, headers=headers)
+        except Exception:
+            GITHUB_REQUESTS.inc(status="error")
+            self.monitor.poll_policy.observe_failure()
+            raise
+        finally:
+            GITHUB_LATENCY.observe(time.perf_counter() - started)
+        GITHUB_REQUESTS.inc(status=response.status_code)
+        self.monitor.poll_policy.observe_response(response.status_code, response.headers)
+        return response
+
+    async def _conditional_get(self, url: str, params: Optional[Dict] = None,
+                               keep_body: bool = True) -> Tuple[object, bool]:
+        """Async counterpart of ArNabH._conditional_get sharing its validator state"""
+        key = self.monitor._cache_key(url, params)
+        headers = self.monitor._validator_headers(key, require_body=keep_body)
+        response = await self._get(url, params=params, headers=headers)
+        if response.status_code == 304:
+            return self.monitor._cached_bodies.get(key), False
+
+        response.raise_for_status()
+        body = response.json()
+        self.monitor._remember_response(key, response.headers, body, keep_body=keep_body)
+        return body, True
+
+    async def get_repo_data(self) -> Dict:
+        """Fetch repository data from GitHub API"""
+        try:
+            data, _ = await self._conditional_get(self.monitor.api_base_url)
+            return data
+        except Exception as e:
+            log.error(f"❌ Error fetching repo data: {e}", extra=fields(repository=self.monitor.repo.full_name))
+            return {}
+
+    async def fetch_commits(self, limit: int = 5) -> Tuple[List[Dict], bool]:
+        """Fetch recent commits, returning (commits, modified)"""
+        try:
+            return await self._conditional_get(
+                f"{self.monitor.api_base_url}/commits",
+                params={"per_page": limit}
+            )
+        except Exception as e:
+            log.error(f"❌ Error fetching commits: {e}", extra=fields(repository=self.monitor.repo.full_name))
+            return [], True
+
+    async def fetch_new_commits(self) -> Tuple[Optional[List[Dict]], bool]:
+        """Async counterpart of ArNabH.fetch_new_commits"""
+        monitor = self.monitor
+        url = f"{monitor.api_base_url}/commits"
+        new_commits: List[Dict] = []
+        try:
+            for page in range(1, monitor.max_pages + 1):
+                params = monitor._commit_page_params(page)
+                if page == 1:
+                    page_commits, modified = await self._conditional_get(url, params, keep_body=False)
+                    if not modified:
+                        return [], False
+                else:
+                    response = await self._get(url, params=params)
+                    response.raise_for_status()
+                    page_commits = response.json()
+
+                found, reached_known = monitor._scan_commit_page(page_commits)
+                new_commits.extend(found)
+                if reached_known:
+                    break
+            else:
+                log.warning(f"⚠️ More than {monitor.page_size * monitor.max_pages} new commits, reporting the newest",
+                            extra=fields(repository=monitor.repo.full_name))
+            return new_commits, True
+        except Exception as e:
+            monitor._forget_commit_validators()
+            log.error(f"❌ Error fetching commits: {e}", extra=fields(repository=self.monitor.repo.full_name))
+            return None, True
+
+    async def fetch_compare(self, base: str, head: str) -> Optional[Dict]:
+        """Async counterpart of ArNabH.fetch_compare, streaming the body"""
+        url = f"{self.monitor.api_base_url}/compare/{base}...{head}"
+        try:
+            async with self.http.stream('GET', url) as response:
+                self.monitor.poll_policy.observe_response(response.status_code, response.headers)
+                response.raise_for_status()
+                reader = self.monitor._compare_reader()
+                async for chunk in response.aiter_bytes(65536):
+                    reader.feed(chunk)
+            return self.monitor._summarize_compare(reader.result())
+        except Exception as e:
+            log.warning(f"⚠️ Compare fetch failed: {type(e).__name__}, reporting commit summaries only",
+                        extra=fields(repository=self.monitor.repo.full_name))
+            return None
+
+    async def create_baseline(self) -> bool:
+        """Create the baseline, fetching repository data and commits concurrently"""
+        log.info("📊 Creating baseline snapshot...", extra=fields(repository=self.monitor.repo.full_name))
+        repo_data, (commits, _) = await asyncio.gather(
+            self.get_repo_data(),
+            self.fetch_commits(self.monitor.page_size)
+        )
+        return self.monitor.set_baseline(repo_data, commits)
+
+    async def detect_changes(self) -> Dict:
+        """Check for changes in the repository"""
+        new_commits, modified = await self.fetch_new_commits()
+        changes = self.monitor.diff_commits(new_commits, modified)
+
+        compare_range = self.monitor.compare_range()
+        if compare_range:
+            self.monitor.attach_file_details(changes, await self.fetch_compare(*compare_range))
+        return changes
+
+    async def analyze_changes_with_gpt(self, changes: Dict) -> str:
+        """Analyze detected changes through the shared batcher and cache"""
+        if not changes.get('changes_detected'):
+            return "No changes detected in the repository."
+
+        cache = self.parent.analysis_cache
+        cache_key = content_key(changes, 'analysis')
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # The batcher coalesces requests from every repository coroutine into
+        # one completion; awaiting its future keeps the event loop free
+        batcher = self.parent.agent.analysis_batcher
+        analysis = await asyncio.wrap_future(
+            batcher.submit(cache_key, self.monitor.build_analysis_prompt(changes))
+        )
+        if analysis is None:
+            log.warning("⚠️ GPT analysis unavailable, using fallback", extra=fields(repository=self.monitor.repo.full_name))
+            return self.monitor.fallback_analysis(changes)
+
+        await to_thread(cache.put, cache_key, analysis)
+        return analysis
+
+    async def check_and_report(self) -> None:
+        """Check for changes and report to parent agent"""
+        started = time.perf_counter()
+        changes = await self.detect_changes()
+        CYCLE_DURATION.observe(time.perf_counter() - started, agent="ar_nab_h")
+        outcome = ("changed" if changes.get('changes_detected') else
+                   "not_modified" if changes.get('not_modified') else
+                   "error" if changes.get('reason') else "unchanged")
+        CHANGES_DETECTED.inc(repository=self.monitor.repo.full_name, outcome=outcome)
+        self.monitor.poll_policy.observe_activity(changes.get('changes_detected'))
+        # Quiet cycles (unchanged, 304) only feed the metrics; failures are still reported
+        if changes.get('changes_detected') or changes.get('reason'):
+            changes['gpt_analysis'] = await self.analyze_changes_with_gpt(changes)
+            await self.parent.process_ar_nab_h_message(changes)
+
+        # Reuse the list we already fetched instead of asking GitHub again;
+        # the store write is SQLite I/O, kept off the event loop
+        if changes.get('changes_detected'):
+            await to_thread(self.monitor.update_baseline, self.monitor.pending_commits)
+        elif not changes.get('not_modified') and not changes.get('reason'):
+            await to_thread(self.monitor._save_baseline)
+
+    async def _acquire_budget(self, cost: int) -> None:
+        """Wait for the shared rate budget without blocking the event loop"""
+        while not self.budget.try_acquire(cost):
+            await asyncio.sleep(1)
+
+    async def run(self) -> None:
+        """Poll forever; cancellation is the shutdown signal"""
+        repo = self.monitor.repo
+        await asyncio.sleep(random.uniform(0, repo.jitter))
+
+        # A persisted baseline head means we can resume without re-baselining
+        baselined = bool(self.monitor.head_sha and self.monitor.sha_index)
+        while True:
+            await self._acquire_budget(1 if baselined else 2)
+            async with self.slots:
+                try:
+                    if baselined:
+                        await self.check_and_report()
+                    else:
+                        baselined = await self.create_baseline()
+                except Exception as e:
+                    log.error(f"❌ Cycle failed: {e}", extra=fields(repository=repo.full_name))
+            await asyncio.sleep(self.monitor.effective_interval + random.uniform(0, repo.jitter))
+
+
+class AsyncSpoonTu:
+    def __init__(self, formatter: SpoonTu, llm: AsyncOpenAI, parent: AsyncFuriousNYL):
+        self.formatter = formatter
+        self.llm = llm
+        self.parent = parent
+
+    async def format_message(self, message: Dict) -> str:
+        """Render locally, or format with GPT when SPOON_TU_GPT_FORMAT is set"""
+        if not self.formatter.use_gpt_format:
+            return self.formatter.renderer.render(message)
+        return await self.format_message_with_gpt(message)
+
+    async def format_message_with_gpt(self, message: Dict) -> str:
+        """Format a report with AsyncOpenAI, sharing the parent cache"""
+        if not message.get('changes_detected'):
+            return self.formatter._create_fallback_format(message)
+
+        cache = self.parent.analysis_cache
+        cache_key = content_key(message, 'format')
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        budget = self.parent.agent.token_budget
+        prompt = self.formatter.build_format_prompt(message)
+        reserved = budget.reserve_for(prompt, 400, "format")
+        if reserved is None:
+            return self.formatter._create_fallback_format(message)
+
+        started = time.perf_counter()
+        try:
+            response = await self.llm.chat.completions.create(
+                model=self.formatter.model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=400,
+                temperature=0.9,
+                timeout=30
+            )
+            observe_completion("format", started, response)
+            budget.settle(reserved, usage_tokens(response))
+            formatted = response.choices[0].message.content
+            await to_thread(cache.put, cache_key, formatted)
+            return formatted
+        except Exception as e:
+            observe_completion("format", started, error=True)
+            budget.settle(reserved, 0)
+            log.warning(f"⚠️ GPT formatting failed: {type(e).__name__}, using fallback format")
+            return self.formatter._create_fallback_format(message)
+
+    async def run(self) -> None:
+        """Display every report as soon as the parent publishes it"""
+        cursor = 0
+        while True:
+            cursor, messages = await self.parent.wait_for_ar_nab_h_messages(cursor)
+            for message in messages:
+                if self.formatter.accept_message(message):
+                    self.formatter.print_report(await self.format_message(message))
+
+
+async def run_system(api_key: str, repos: Optional[List[RepoConfig]] = None) -> None:
+    """Run the whole agent system on the current event loop until cancelled"""
+    # The async monitors only speak REST; don't quietly poll the API instead of the mirror
+    if os.getenv('AR_NAB_H_SOURCE', 'rest').lower() == 'git':
+        raise ValueError("AR_NAB_H_SOURCE=git is not supported by the async engine (--async); "
+                         "run without --async to use the git mirror")
+    repos = repos or load_registry()
+    max_concurrency = int(os.getenv('MONITOR_MAX_CONCURRENCY', '4'))
+
+    parent = AsyncFuriousNYL(FuriousNYL(api_key=api_key))
+    budget = RateBudget.from_env()
+    slots = asyncio.Semaphore(max_concurrency)
+    shared_session = GitHubSession.from_env()
+    rate_state = RateLimitState()
+    baseline_store = BaselineStore.from_env()
+
+    http = httpx.AsyncClient(
+        headers={'Accept': 'application/vnd.github+json', 'User-Agent': 'Ar-Nab-h-monitor'},
+        timeout=float(os.getenv('GITHUB_API_TIMEOUT', '10')),
+        limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+    )
+    llm = AsyncOpenAI(api_key=api_key)
+
+    monitors = [
+        AsyncArNabH(
+            ArNabH(api_key=api_key, parent_agent=parent.agent, session=shared_session,
+                   repo=repo, announce=len(repos) == 1, rate_state=rate_state,
+                   store=baseline_store),
+            http, llm, parent, budget, slots
+        )
+        for repo in repos
+    ]
+    spoon_tu = AsyncSpoonTu(SpoonTu(api_key=api_key, parent_agent=parent.agent), llm, parent)
+
+    log.info("✅ Async engine started", extra=fields(repositories=len(monitors), max_concurrency=max_concurrency))
+
+    tasks = [asyncio.create_task(monitor.run()) for monitor in monitors]
+    tasks.append(asyncio.create_task(spoon_tu.run()))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # Cancellation is the shutdown path: stop every coroutine, then close clients
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await http.aclose()
+        await llm.close()
+        shared_session.close()
+        baseline_store.close()
+        parent.agent.shutdown()
+
+
+def main(api_key: str) -> None:
+    """Blocking entry point used by main.py --async"""
+    try:
+        asyncio.run(run_system(api_key))
+    except KeyboardInterrupt:
+        log.info("✅ Async engine shut down")
@@ -0,0 +1,161 @@
+"""
+Baseline Store: Crash-safe baseline persistence for Ar-Nab-h
+SQLite in WAL mode holds the baseline and commit-SHA history of any number
+of repositories in one file. Every save is a single atomic transaction, new
+SHAs are appended rather than rewriting the whole history, and the last
+known head is a primary-key lookup.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS baselines (
+    repo TEXT PRIMARY KEY,
+    baseline_hash TEXT,
+    head_sha TEXT,
+    validators TEXT NOT NULL DEFAULT '{}',
+    commits TEXT NOT NULL DEFAULT '[]',
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS commits (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    UNIQUE (repo, sha)
+);
+CREATE INDEX IF NOT EXISTS commits_by_repo ON commits (repo, seq);
+"""
+
+
+class BaselineStore:
+    def __init__(self, path: str = "baseline.db"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection shared by all monitors; sqlite3 serializes through our lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> 'BaselineStore':
+        """Open the store named by BASELINE_DB"""
+        return cls(os.getenv('BASELINE_DB', 'baseline.db'))
+
+    def head(self, repo: str) -> Optional[str]:
+        """Return the last known head SHA for a repository"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT head_sha FROM baselines WHERE repo = ?", (repo,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def load(self, repo: str, max_shas: int = 10000) -> Optional[Dict]:
+        """Return the stored baseline for a repository, with its newest known SHAs oldest first"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT baseline_hash, head_sha, validators, commits FROM baselines WHERE repo = ?",
+                (repo,)
+            ).fetchone()
+            if row is None:
+                return None
+            shas = self._conn.execute(
+                "SELECT sha FROM (SELECT seq, sha FROM commits WHERE repo = ? ORDER BY seq DESC LIMIT ?) "
+                "ORDER BY seq",
+                (repo, max_shas)
+            ).fetchall()
+        return {
+            'hash': row[0],
+            'head_sha': row[1],
+            'validators': json.loads(row[2]),
+            'commits': json.loads(row[3]),
+            'known_shas': [sha for (sha,) in shas]
+        }
+
+    def save(self, repo: str, baseline_hash: Optional[str], head_sha: Optional[str],
+             validators: Dict, commits: List[Dict],
+             new_shas: Optional[List[str]] = None, reset: bool = False,
+             max_shas: int = 10000) -> None:
+        """
+        Atomically upsert a repository's baseline and append its new SHAs
+        (oldest first). reset=True replaces the SHA history.
+        """
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                if reset:
+                    self._conn.execute("DELETE FROM commits WHERE repo = ?", (repo,))
+                self._conn.execute(
+                    "INSERT INTO baselines (repo, baseline_hash, head_sha, validators, commits, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(repo) DO UPDATE SET baseline_hash = excluded.baseline_hash, "
+                    "head_sha = excluded.head_sha, validators = excluded.validators, "
+                    "commits = excluded.commits, updated_at = excluded.updated_at",
+                    (repo, baseline_hash, head_sha, json.dumps(validators),
+                     json.dumps(commits), datetime.now().isoformat())
+                )
+                if new_shas:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO commits (repo, sha) VALUES (?, ?)",
+                        [(repo, sha) for sha in new_shas]
+                    )
+                    self._trim(repo, max_shas)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _trim(self, repo: str, keep: int) -> None:
+        """Drop all but the newest `keep` SHAs of a repository (caller holds the lock)"""
+        self._conn.execute(
+            "DELETE FROM commits WHERE repo = ? AND seq <= "
+            "(SELECT seq FROM commits WHERE repo = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+            (repo, repo, keep)
+        )
+
+    def import_legacy(self, repo: str, baseline_file: str) -> bool:
+        """Migrate a pre-store baseline.json into the store; returns True if imported"""
+        if not os.path.exists(baseline_file):
+            return False
+        with open(baseline_file, 'r') as f:
+            data = json.load(f)
+        commits = data.get('commits', [])
+        known_shas = data.get('known_shas') or [c.get('sha') for c in reversed(commits)]
+        self.save(
+            repo,
+            data.get('hash'),
+            data.get('head_sha') or (commits[0].get('sha') if commits else None),
+            data.get('validators', {}),
+            commits,
+            new_shas=[sha for sha in known_shas if sha],
+            reset=True
+        )
+        return True
+
+    def repositories(self) -> List[str]:
+        """Return every repository with a stored baseline"""
+        with self._lock:
+            return [repo for (repo,) in self._conn.execute("SELECT repo FROM baselines ORDER BY repo")]
+
+    def compact(self, max_shas: int = 10000) -> None:
+        """Trim every repository's SHA history, fold the WAL back and reclaim space"""
+        with self._lock:
+            repos = [repo for (repo,) in self._conn.execute("SELECT repo FROM baselines")]
+            self._conn.execute("BEGIN IMMEDIATE")
+            for repo in repos:
+                self._trim(repo, max_shas)
+            self._conn.execute("COMMIT")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
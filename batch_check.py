@@ -0,0 +1,178 @@
+"""
+Batch Check: Check every repository once and exit, for cron
+Repositories are checked in parallel and each one is printed as a JSON line.
+Baselines, SHA indexes and ETags persist in the baseline store, so a run
+with nothing new costs one conditional request (a 304) per repository.
+
+    python batch_check.py [owner/name ...] [--workers N] [--no-analysis]
+
+Exit status: 0 nothing new, 1 changes detected, 2 a check failed.
+A repository's baseline only advances once its line has been written, so a
+check that times out is retried in full by the next run.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Exit statuses (diff-style: 1 means "something changed", 2 means trouble)
+EXIT_OK = 0
+EXIT_CHANGES = 1
+EXIT_ERROR = 2
+
+
+def check_repository(monitor, analyze: bool) -> Dict:
+    """Check one repository and return its JSON line"""
+    started = time.perf_counter()
+    result = {'repository': monitor.repo.full_name}
+    try:
+        if not (monitor.head_sha and monitor.sha_index):
+            # First run for this repository: record where monitoring starts
+            if not monitor.create_baseline():
+                return dict(result, status="error", error="Failed to create baseline",
+                            duration_ms=round((time.perf_counter() - started) * 1000, 1))
+            result.update(status="baselined", head_sha=monitor.head_sha)
+        else:
+            changes = monitor.check()
+            if changes.get('reason'):
+                result.update(status="error", error=changes['reason'])
+            elif changes.get('changes_detected'):
+                result.update(
+                    status="changed",
+                    head_sha=monitor.head_sha,
+                    new_commits=changes.get('new_commits', 0),
+                    commits=changes.get('modified_files', []),
+                    analysis=(monitor.analyze_changes_with_gpt(changes) if analyze
+                              else monitor.fallback_analysis(changes))
+                )
+                if changes.get('diff_stats'):
+                    result['diff_stats'] = changes['diff_stats']
+            else:
+                result.update(status="not_modified" if changes.get('not_modified') else "unchanged",
+                              head_sha=monitor.head_sha)
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    result['check_time'] = datetime.now().isoformat()
+    result['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def exit_status(results: List[Dict]) -> int:
+    if any(r['status'] == "error" for r in results):
+        return EXIT_ERROR
+    if any(r['status'] == "changed" for r in results):
+        return EXIT_CHANGES
+    return EXIT_OK
+
+
+def run_batch(repos: List[str], workers: Optional[int] = None, analyze: bool = True,
+              timeout: float = 300, output=None) -> int:
+    """
+    Check the repositories once, write one JSON line each and return the exit
+    status. If checks timed out the process exits at once, since their
+    threads can't be stopped and would otherwise keep it alive.
+    """
+    from agent_logging import fields, get_logger, shutdown_logging
+    from adaptive_poll import RateLimitState
+    from ar_nab_h import ArNabH
+    from baseline_store import BaselineStore
+    from furious_nyl import FuriousNYL
+    from github_session import GitHubSession
+    from repo_registry import load_registry
+
+    log = get_logger("batch_check")
+    output = output or sys.stdout
+    configs = load_registry(specs=repos or None)
+    workers = workers or int(os.getenv('MONITOR_MAX_CONCURRENCY', '4'))
+
+    # Without a key GPT can't be reached; the local analysis avoids a failing call per change
+    api_key = os.getenv('OPENAI_API_KEY', '')
+    analyze = analyze and bool(api_key)
+
+    parent = FuriousNYL(api_key=api_key)
+    session = GitHubSession.from_env()
+    store = BaselineStore.from_env()
+    rate_state = RateLimitState()
+    monitors = [
+        ArNabH(api_key=api_key, parent_agent=parent, session=session, repo=repo,
+               announce=False, rate_state=rate_state, store=store)
+        for repo in configs
+    ]
+    for monitor in monitors:
+        monitor.defer_saves = True
+
+    if analyze:
+        parent.client.warm()
+
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="Batch")
+    futures = {executor.submit(check_repository, monitor, analyze): monitor for monitor in monitors}
+    done, not_done = wait(futures, timeout=timeout)
+
+    results = []
+    for future, monitor in futures.items():
+        if future in done:
+            results.append(future.result())
+        else:
+            future.cancel()
+            results.append({'repository': monitor.repo.full_name, 'status': "error",
+                            'error': f"Timed out after {timeout:g}s"})
+    for result in results:
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+    output.flush()
+
+    # Reported checks advance their baselines; timed-out ones never do
+    for future, monitor in futures.items():
+        if future in done:
+            monitor.flush_baseline()
+
+    status = exit_status(results)
+    log.info("✅ Batch check complete", extra=fields(
+        repositories=len(results), exit_status=status,
+        changed=sum(1 for r in results if r['status'] == "changed"),
+        failed=sum(1 for r in results if r['status'] == "error"),
+        seconds=round(time.perf_counter() - started, 2), **session.stats()
+    ))
+
+    if not_done:
+        # A timed-out check may still be in an HTTP call; don't wait for it
+        shutdown_logging()
+        os._exit(status)
+
+    executor.shutdown()
+    parent.shutdown()
+    store.close()
+    session.close()
+    return status
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check repositories once and print JSON lines")
+    parser.add_argument('repos', nargs='*', help="owner/name (default: the configured registry)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="parallel checks (default: MONITOR_MAX_CONCURRENCY)")
+    parser.add_argument('--no-analysis', action='store_true', help="use the local analysis instead of GPT")
+    parser.add_argument('--timeout', type=float, default=300, help="seconds before unfinished checks fail")
+    parser.add_argument('--output', help="append JSON lines to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    # Logs go to stderr so stdout carries nothing but the JSON lines
+    from agent_logging import setup_logging
+    setup_logging(level=os.getenv('LOG_LEVEL', 'WARNING'), stream=sys.stderr)
+
+    try:
+        if args.output:
+            with open(args.output, 'a', encoding='utf-8') as output:
+                return run_batch(args.repos, args.workers, not args.no_analysis, args.timeout, output)
+        return run_batch(args.repos, args.workers, not args.no_analysis, args.timeout)
+    except Exception as e:
+        print(f"❌ Batch check failed: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Benchmark: End-to-end performance run against the fake services
+Starts fake_services, runs Furious-NYL, the Ar-Nab-h scheduler and Spoon-tu
+against them for a fixed time, and reports throughput, commit-to-display
+latency percentiles, requests per detected change and peak RSS.
+
+    python benchmark.py --repos 10 --duration 30 --churn 0.5
+    python benchmark.py --json --max-p90 5   # exit 1 if p90 latency regresses
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fake_services import FakeConfig, FakeServices
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile, or None for no samples"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_benchmark(repos: int = 5, duration: float = 30.0, interval: float = 1.0,
+                  concurrency: int = 4, config: Optional[FakeConfig] = None,
+                  streaming: bool = False) -> Dict:
+    """Run the threaded agent system against fake services and collect results"""
+    config = config or FakeConfig(churn_interval=0.5, rate_limit=100000)
+    repo_names = [f"bench-org/repo-{i + 1}" for i in range(repos)]
+    # Removed after the run, or by its finalizer if the run fails
+    workdir = tempfile.TemporaryDirectory(prefix="agent-bench-")
+
+    services = FakeServices(repo_names, config).start()
+    initial_commits = {name: len(repo.commits) for name, repo in services.github.repos.items()}
+
+    # Agents read their configuration at construction/import time
+    os.environ.update(services.env())
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ['LLM_STREAMING'] = 'true' if streaming else 'false'
+    os.environ['ANALYSIS_CACHE_FILE'] = ''
+    os.environ['METRICS_PORT'] = ''
+    # Match the scheduler's token bucket to the fake server's quota
+    os.environ['GITHUB_RATE_LIMIT'] = str(config.rate_limit)
+
+    from adaptive_poll import RateLimitState
+    from ar_nab_h import ArNabH
+    from baseline_store import BaselineStore
+    from furious_nyl import FuriousNYL
+    from github_session import GitHubSession
+    from repo_registry import RepoConfig
+    from repo_scheduler import RepoScheduler
+    from spoon_tu import SpoonTu
+
+    shown: List[Tuple[str, float]] = []  # (abbreviated sha, display time)
+    displayed = {'reports': 0, 'commits': 0}
+    lock = threading.Lock()
+
+    class BenchSpoonTu(SpoonTu):
+        """Spoon-tu that timestamps every displayed commit"""
+
+        def display_formatted_message(self, message: Dict) -> None:
+            super().display_formatted_message(message)
+            if not message.get('changes_detected'):
+                return
+            now = time.time()
+            with lock:
+                displayed['reports'] += 1
+                # Commit times are looked up after the run, off the timed display path
+                for commit in message.get('modified_files', []):
+                    shown.append((commit.get('sha', ''), now))
+
+    parent = FuriousNYL(api_key="sk-benchmark")
+    session = GitHubSession.from_env()
+    rate_state = RateLimitState()
+    store = BaselineStore(os.path.join(workdir.name, "baseline.db"))
+    monitors = [
+        ArNabH(api_key="sk-benchmark", parent_agent=parent, session=session,
+               repo=RepoConfig(*name.split('/'), interval=interval, jitter=min(1.0, interval / 4)),
+               announce=False, rate_state=rate_state, store=store)
+        for name in repo_names
+    ]
+    scheduler = RepoScheduler(monitors, max_concurrency=concurrency)
+    spoon_tu = BenchSpoonTu(api_key="sk-benchmark", parent_agent=parent)
+
+    threads = [
+        threading.Thread(target=parent.run, name="Furious-NYL", daemon=True),
+        threading.Thread(target=scheduler.run, name="Ar-Nab-h", daemon=True),
+        threading.Thread(target=spoon_tu.run, name="Spoon-tu", daemon=True),
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+
+    scheduler.shutdown()
+    parent.analysis_pool.join(timeout=10)
+    spoon_tu.shutdown()
+    parent.shutdown()
+    for thread in threads:
+        thread.join(timeout=5)
+    elapsed = time.perf_counter() - started
+
+    services.stop()
+    store.close()
+    session.close()
+    workdir.cleanup()
+
+    latencies: List[float] = []
+    for sha_prefix, displayed_at in shown:
+        created = services.github.commit_created_at(sha_prefix)
+        if created is not None:
+            displayed['commits'] += 1
+            latencies.append(displayed_at - created)
+
+    fake = services.stats()
+    created = sum(len(repo.commits) - initial_commits[name] for name, repo in services.github.repos.items())
+    changes = max(1, displayed['reports'])
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+    return {
+        'repos': repos,
+        'duration_s': round(elapsed, 2),
+        'poll_interval_s': interval,
+        'streaming': streaming,
+        'commits_created': created,
+        'commits_displayed': displayed['commits'],
+        'reports_displayed': displayed['reports'],
+        'throughput': {
+            'reports_per_s': round(displayed['reports'] / elapsed, 3),
+            'commits_per_s': round(displayed['commits'] / elapsed, 3),
+            'github_requests_per_s': round(fake['github_requests'] / elapsed, 3),
+        },
+        'latency_s': {
+            'p50': percentile(latencies, 50),
+            'p90': percentile(latencies, 90),
+            'p99': percentile(latencies, 99),
+            'max': max(latencies) if latencies else None,
+        },
+        'per_change': {
+            'github_requests': round(fake['github_requests'] / changes, 2),
+            'openai_requests': round(fake['openai_requests'] / changes, 2),
+            'openai_tokens': round((fake['openai_prompt_tokens'] + fake['openai_completion_tokens']) / changes, 1),
+        },
+        'memory_mb': {
+            'max_rss': round(max_rss_mb, 2),
+        },
+        'fake_services': fake,
+    }
+
+
+def print_results(results: Dict) -> None:
+    """Human-readable summary"""
+    def fmt(value):
+        return "n/a" if value is None else f"{value:.3f}s"
+
+    latency = results['latency_s']
+    print("\n" + "=" * 80)
+    print(f"📈 BENCHMARK RESULTS - {results['repos']} repositories, {results['duration_s']}s")
+    print("=" * 80)
+    print(f"  Commits created/displayed: {results['commits_created']} / {results['commits_displayed']}")
+    print(f"  Reports displayed:         {results['reports_displayed']} "
+          f"({results['throughput']['reports_per_s']}/s)")
+    print(f"  GitHub requests/s:         {results['throughput']['github_requests_per_s']}")
+    print(f"  Commit → display latency:  p50 {fmt(latency['p50'])}  p90 {fmt(latency['p90'])}  "
+          f"p99 {fmt(latency['p99'])}  max {fmt(latency['max'])}")
+    print(f"  Per detected change:       {results['per_change']['github_requests']} GitHub requests, "
+          f"{results['per_change']['openai_requests']} OpenAI requests, "
+          f"{results['per_change']['openai_tokens']} tokens")
+    print(f"  Memory:                    max RSS {results['memory_mb']['max_rss']} MB")
+    print("=" * 80)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the agent system against fake services")
+    parser.add_argument('--repos', type=int, default=5)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--interval', type=float, default=1.0, help="poll interval per repository")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--churn', type=float, default=0.5, help="seconds between fake commits")
+    parser.add_argument('--latency', type=float, default=0.02, help="fake GitHub latency (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--llm-latency', type=float, default=0.2)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=100000, help="fake GitHub requests per hour")
+    parser.add_argument('--streaming', action='store_true', help="enable LLM_STREAMING")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    parser.add_argument('--output', help="also write the JSON results to this file")
+    parser.add_argument('--max-p90', type=float, help="exit 1 if p90 latency exceeds this many seconds")
+    args = parser.parse_args()
+
+    if args.json:
+        # stdout carries only the results: logs go to stderr, reports are discarded
+        from agent_logging import setup_logging
+        setup_logging(stream=sys.stderr, output=open(os.devnull, 'w'))
+
+    config = FakeConfig(latency=args.latency, error_rate=args.error_rate, rate_limit=args.rate_limit,
+                        churn_interval=args.churn, llm_latency=args.llm_latency,
+                        llm_error_rate=args.llm_error_rate)
+    results = run_benchmark(args.repos, args.duration, args.interval, args.concurrency,
+                            config, streaming=args.streaming)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    p90 = results['latency_s']['p90']
+    if args.max_p90 is not None and (p90 is None or p90 > args.max_p90):
+        print(f"❌ p90 latency {p90} exceeds {args.max_p90}s", file=sys.stderr if args.json else sys.stdout)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Bounded JSON: Streaming, size-bounded JSON reader
+Consumes a response body chunk by chunk and truncates long string values
+while they stream past, so a multi-megabyte diff never has to sit in memory
+before json.loads() sees it. Keys and structure are kept intact.
+"""
+import codecs
+import json
+import re
+from typing import Dict, Iterable, List, Optional
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_STRUCTURAL = re.compile(r'["{}\[\],:]')
+
+
+class ResponseTooLarge(Exception):
+    """Raised when the raw body exceeds the reader's byte limit"""
+
+
+class BoundedJSONReader:
+    def __init__(self, default_limit: int = 2000, key_limits: Optional[Dict[str, int]] = None,
+                 max_bytes: int = 20 * 1024 * 1024):
+        self.default_limit = default_limit
+        self.key_limits = key_limits or {}
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.truncated_strings = 0
+
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._out: List[str] = []
+        self._stack: List[str] = []
+        self._expect_key = False
+        self._in_string = False
+        self._string_is_key = False
+        self._key_parts: List[str] = []
+        self._current_key: Optional[str] = None
+        self._string_length = 0
+        self._string_limit = 0
+        self._escape = ''
+
+    def feed(self, chunk: bytes) -> None:
+        """Consume the next chunk of the raw body"""
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.max_bytes:
+            raise ResponseTooLarge(f"response exceeds {self.max_bytes} bytes")
+        self._scan(self._decoder.decode(chunk))
+
+    def result(self):
+        """Finish the stream and return the parsed (truncated) document"""
+        self._scan(self._decoder.decode(b'', final=True))
+        return json.loads(''.join(self._out))
+
+    def _emit_string_part(self, text: str) -> None:
+        """Append string content, honouring the current value's limit"""
+        if self._string_is_key:
+            self._key_parts.append(text)
+            self._out.append(text)
+            return
+        room = self._string_limit - self._string_length
+        if room <= 0:
+            return
+        if len(text) > room:
+            if text[0] == '\\':
+                # Never split an escape sequence; the string is full from here on
+                self._string_length = self._string_limit
+                return
+            text = text[:room]
+        self._out.append(text)
+        self._string_length += len(text)
+
+    def _close_string(self) -> None:
+        self._out.append('"')
+        self._in_string = False
+        if self._string_is_key:
+            self._current_key = ''.join(self._key_parts)
+            self._key_parts = []
+        elif self._string_length >= self._string_limit:
+            self.truncated_strings += 1
+
+    def _scan(self, text: str) -> None:
+        pos = 0
+        length = len(text)
+        while pos < length:
+            if self._in_string:
+                if self._escape:
+                    # Complete a pending escape (\\x or \\uXXXX), possibly across chunks
+                    self._escape += text[pos]
+                    pos += 1
+                    if len(self._escape) == (6 if self._escape[1] == 'u' else 2):
+                        self._emit_string_part(self._escape)
+                        self._escape = ''
+                    continue
+
+                match = _STRING_SPECIAL.search(text, pos)
+                end = match.start() if match else length
+                if end > pos:
+                    self._emit_string_part(text[pos:end])
+                pos = end
+                if match:
+                    if text[pos] == '"':
+                        self._close_string()
+                    else:
+                        self._escape = '\\'
+                    pos += 1
+                continue
+
+            match = _STRUCTURAL.search(text, pos)
+            end = match.start() if match else length
+            literal = text[pos:end].strip()
+            if literal:
+                self._out.append(literal)
+            if not match:
+                break
+            char = text[end]
+            pos = end + 1
+            if char == '"':
+                self._in_string = True
+                self._string_is_key = bool(self._stack) and self._stack[-1] == '{' and self._expect_key
+                self._string_length = 0
+                if not self._string_is_key:
+                    self._string_limit = self.key_limits.get(self._current_key, self.default_limit)
+                self._out.append(char)
+            elif char in '{[':
+                self._stack.append(char)
+                self._expect_key = char == '{'
+                self._out.append(char)
+            elif char in '}]':
+                if self._stack:
+                    self._stack.pop()
+                self._expect_key = False
+                self._out.append(char)
+            elif char == ',':
+                self._expect_key = bool(self._stack) and self._stack[-1] == '{'
+                self._out.append(char)
+            else:  # ':'
+                self._expect_key = False
+                self._out.append(char)
+
+
+def load_bounded(chunks: Iterable[bytes], default_limit: int = 2000,
+                 key_limits: Optional[Dict[str, int]] = None,
+                 max_bytes: int = 20 * 1024 * 1024):
+    """Parse a chunked JSON body with per-key string truncation"""
+    reader = BoundedJSONReader(default_limit, key_limits, max_bytes)
+    for chunk in chunks:
+        if chunk:
+            reader.feed(chunk)
+    return reader.result()
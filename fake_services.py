@@ -0,0 +1,421 @@
+"""
+Fake Services: Offline stand-ins for the GitHub REST API and OpenAI
+A local GitHub server (repo, commits, compare) with ETags, rate-limit
+headers and background commit churn, and an OpenAI-compatible
+/v1/chat/completions endpoint (plain, JSON mode and SSE streaming).
+Latency and error rates are configurable, so the agents can be exercised
+and benchmarked without network access.
+
+Point the agents at it with GITHUB_API_URL and OPENAI_BASE_URL, or run
+    python fake_services.py --churn 2
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class FakeConfig:
+    latency: float = 0.02  # seconds added to every response
+    latency_jitter: float = 0.01  # extra random seconds, uniform
+    error_rate: float = 0.0  # fraction of requests answered with a 5xx
+    rate_limit: int = 5000  # non-304 GitHub requests per rate window
+    rate_window: float = 3600.0  # seconds
+    churn_interval: float = 0.0  # seconds between new commits per repo (0 disables churn)
+    churn_burst: int = 1  # commits added per churn tick
+    files_per_commit: int = 3
+    llm_latency: float = 0.2  # seconds before the first token / full answer
+    llm_token_delay: float = 0.01  # seconds between streamed tokens
+    llm_error_rate: float = 0.0
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class FakeRepo:
+    """Commit history of one fake repository, newest first"""
+
+    def __init__(self, full_name: str, files_per_commit: int = 3, initial_commits: int = 20):
+        self.full_name = full_name
+        self.files_per_commit = files_per_commit
+        self.commits: List[Dict] = []
+        self.created_at: Dict[str, float] = {}  # sha -> wall time the commit appeared
+        self.version = 0
+        self._lock = threading.Lock()
+        base = time.time() - initial_commits * 60
+        for i in range(initial_commits):
+            self.add_commit(created=base + i * 60)
+
+    def add_commit(self, created: Optional[float] = None) -> Dict:
+        with self._lock:
+            created = created if created is not None else time.time()
+            index = len(self.commits) + 1
+            sha = hashlib.sha1(f"{self.full_name}:{index}".encode()).hexdigest()
+            commit = {
+                'sha': sha,
+                'commit': {
+                    'message': f"Change {index} to {self.full_name}",
+                    'author': {'name': f"dev{index % 5}", 'date': _iso(created)},
+                    'committer': {'name': f"dev{index % 5}", 'date': _iso(created)},
+                },
+                'files': [
+                    {'filename': f"src/module_{(index + f) % 17}.py", 'status': 'modified',
+                     'additions': 3 + f, 'deletions': 1, 'patch': "@@ -1 +1 @@\n-old\n+new\n" * (5 + f)}
+                    for f in range(self.files_per_commit)
+                ],
+            }
+            self.commits.insert(0, commit)
+            self.created_at[sha] = time.time()
+            self.version += 1
+            return commit
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.commits), self.version
+
+
+class FakeGitHub:
+    """State and request handling of the fake GitHub API"""
+
+    def __init__(self, config: FakeConfig, repos: List[str]):
+        self.config = config
+        self.repos: Dict[str, FakeRepo] = {
+            name.lower(): FakeRepo(name, config.files_per_commit) for name in repos
+        }
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+        self._rate_used = 0
+        self._rate_reset = time.time() + config.rate_window
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def commit_created_at(self, sha_prefix: str) -> Optional[float]:
+        """Wall time a commit (full or abbreviated SHA) appeared"""
+        for repo in self.repos.values():
+            for sha, created in list(repo.created_at.items()):
+                if sha.startswith(sha_prefix):
+                    return created
+        return None
+
+    def start_churn(self) -> None:
+        if self.config.churn_interval <= 0:
+            return
+
+        def churn():
+            while not self._stop_event.wait(self.config.churn_interval * random.uniform(0.5, 1.5)):
+                repo = random.choice(list(self.repos.values()))
+                for _ in range(self.config.churn_burst):
+                    repo.add_commit()
+
+        threading.Thread(target=churn, name="FakeGitHub-Churn", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def rate_headers(self, counted: bool) -> Dict[str, str]:
+        with self._lock:
+            now = time.time()
+            if now >= self._rate_reset:
+                self._rate_used = 0
+                self._rate_reset = now + self.config.rate_window
+            if counted:
+                self._rate_used += 1
+            remaining = max(0, self.config.rate_limit - self._rate_used)
+            return {
+                'X-RateLimit-Limit': str(self.config.rate_limit),
+                'X-RateLimit-Remaining': str(remaining),
+                'X-RateLimit-Reset': str(int(self._rate_reset)),
+                'X-RateLimit-Used': str(self._rate_used),
+            }
+
+    def handle(self, path: str, query: Dict[str, List[str]], if_none_match: Optional[str]):
+        """Return (status, headers, body) for a GET"""
+        with self._lock:
+            self.requests += 1
+        if random.random() < self.config.error_rate:
+            with self._lock:
+                self.errors += 1
+            return random.choice((500, 502, 503)), self.rate_headers(True), {'message': 'Server Error'}
+
+        match = re.match(r'^/repos/([^/]+/[^/]+)(/commits|/compare/([^.]+)\.\.\.(.+))?$', path)
+        repo = self.repos.get(match.group(1).lower()) if match else None
+        if repo is None:
+            return 404, self.rate_headers(True), {'message': 'Not Found'}
+
+        commits, version = repo.snapshot()
+        if match.group(2) is None:
+            body = {'full_name': repo.full_name, 'updated_at': commits[0]['commit']['committer']['date']}
+        elif match.group(2) == '/commits':
+            body = self._commits_page(commits, query)
+        else:
+            body = self._compare(commits, match.group(3), match.group(4))
+            if body is None:
+                return 404, self.rate_headers(True), {'message': 'Not Found'}
+
+        etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest() + '"'
+        if if_none_match == etag:
+            # Conditional hits don't count against the GitHub rate limit
+            with self._lock:
+                self.not_modified += 1
+            headers = self.rate_headers(False)
+            headers['ETag'] = etag
+            return 304, headers, None
+
+        headers = self.rate_headers(True)
+        if headers['X-RateLimit-Remaining'] == '0' and self._rate_used > self.config.rate_limit:
+            return 403, headers, {'message': 'API rate limit exceeded'}
+        headers['ETag'] = etag
+        return 200, headers, body
+
+    @staticmethod
+    def _public(commit: Dict) -> Dict:
+        return {'sha': commit['sha'], 'commit': commit['commit']}
+
+    def _commits_page(self, commits: List[Dict], query: Dict[str, List[str]]) -> List[Dict]:
+        per_page = min(100, int(query.get('per_page', ['30'])[0]))
+        page = int(query.get('page', ['1'])[0])
+        since = query.get('since', [None])[0]
+        if since:
+            commits = [c for c in commits if c['commit']['committer']['date'] >= since]
+        return [self._public(c) for c in commits[(page - 1) * per_page:page * per_page]]
+
+    def _compare(self, commits: List[Dict], base: str, head: str) -> Optional[Dict]:
+        shas = [c['sha'] for c in commits]
+        if base not in shas or head not in shas:
+            return None
+        newer = commits[shas.index(head):shas.index(base)]
+        files: Dict[str, Dict] = {}
+        for commit in reversed(newer):
+            for f in commit['files']:
+                files[f['filename']] = dict(f)
+        return {
+            'status': 'ahead',
+            'total_commits': len(newer),
+            'commits': [self._public(c) for c in reversed(newer)],
+            'files': list(files.values()),
+        }
+
+
+class FakeOpenAI:
+    """OpenAI-compatible chat completions with canned analysis text"""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.requests = 0
+        self.streamed = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _answer(prompt: str, json_mode: bool) -> str:
+        if json_mode:
+            match = re.search(r'You will receive (\d+) independent', prompt)
+            count = int(match.group(1)) if match else 1
+            return json.dumps({str(i): f"Change set {i}: routine update with low risk." for i in range(1, count + 1)})
+        if 'formatted console report' in prompt:
+            return "📋 Repository report\n  ✅ Changes reviewed\n  📝 Routine update with low risk."
+        return "The new commits make routine updates to a few modules. Impact is low; no breaking changes expected."
+
+    def complete(self, request: Dict):
+        """Return (status, body or list of SSE chunks, streamed)"""
+        with self._lock:
+            self.requests += 1
+        prompt = "\n".join(str(m.get('content', '')) for m in request.get('messages', []))
+        stream = bool(request.get('stream'))
+        if random.random() < self.config.llm_error_rate:
+            with self._lock:
+                self.errors += 1
+            return 500, {'error': {'message': 'fake upstream error', 'type': 'server_error'}}, False
+
+        json_mode = (request.get('response_format') or {}).get('type') == 'json_object'
+        text = self._answer(prompt, json_mode)
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(text) // 4)
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+        completion_id = f"chatcmpl-{random.getrandbits(48):012x}"
+        created = int(time.time())
+        model = request.get('model', 'gpt-4o-mini')
+        if not stream:
+            return 200, {
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': text}}],
+                'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                          'total_tokens': prompt_tokens + completion_tokens},
+            }, False
+
+        with self._lock:
+            self.streamed += 1
+        pieces = re.findall(r'\S+\s*|\s+', text)
+        chunks = [{'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                   'choices': [{'index': 0, 'delta': {'role': 'assistant', 'content': piece},
+                                'finish_reason': None}]}
+                  for piece in pieces]
+        chunks.append({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                       'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+        return 200, chunks, True
+
+
+def _make_handler(github: FakeGitHub, openai: FakeOpenAI):
+    config = github.config
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, body, headers: Optional[Dict[str, str]] = None) -> None:
+            payload = b'' if body is None else json.dumps(body).encode()
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            if body is not None:
+                self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            time.sleep(config.latency + random.uniform(0, config.latency_jitter))
+            url = urlparse(self.path)
+            status, headers, body = github.handle(url.path, parse_qs(url.query), self.headers.get('If-None-Match'))
+            self._send_json(status, body, headers)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._send_json(404, {'error': {'message': 'not found'}})
+                return
+
+            time.sleep(config.llm_latency)
+            status, body, streamed = openai.complete(request)
+            if not streamed:
+                self._send_json(status, body)
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for chunk in body + ['[DONE]']:
+                data = chunk if isinstance(chunk, str) else json.dumps(chunk)
+                event = f"data: {data}\n\n".encode()
+                self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+                self.wfile.flush()
+                time.sleep(config.llm_token_delay)
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+class FakeServices:
+    """Runs the fake GitHub and OpenAI servers on local ports"""
+
+    def __init__(self, repos: Optional[List[str]] = None, config: Optional[FakeConfig] = None,
+                 host: str = "127.0.0.1", github_port: int = 0, openai_port: int = 0):
+        self.config = config or FakeConfig()
+        self.github = FakeGitHub(self.config, repos or ["fake-org/repo-1"])
+        self.openai = FakeOpenAI(self.config)
+        handler = _make_handler(self.github, self.openai)
+        self._servers = [
+            ThreadingHTTPServer((host, github_port), handler),
+            ThreadingHTTPServer((host, openai_port), handler),
+        ]
+        for server in self._servers:
+            server.daemon_threads = True
+
+    @property
+    def github_url(self) -> str:
+        host, port = self._servers[0].server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_url(self) -> str:
+        host, port = self._servers[1].server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def env(self) -> Dict[str, str]:
+        """Environment that points the agents at these servers"""
+        return {'GITHUB_API_URL': self.github_url, 'OPENAI_BASE_URL': self.openai_url}
+
+    def start(self) -> 'FakeServices':
+        for server in self._servers:
+            threading.Thread(target=server.serve_forever, name="FakeServices-HTTP", daemon=True).start()
+        self.github.start_churn()
+        return self
+
+    def stop(self) -> None:
+        self.github.stop()
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    def stats(self) -> Dict:
+        return {
+            'github_requests': self.github.requests,
+            'github_not_modified': self.github.not_modified,
+            'github_errors': self.github.errors,
+            'openai_requests': self.openai.requests,
+            'openai_streamed': self.openai.streamed,
+            'openai_errors': self.openai.errors,
+            'openai_prompt_tokens': self.openai.prompt_tokens,
+            'openai_completion_tokens': self.openai.completion_tokens,
+        }
+
+    def __enter__(self) -> 'FakeServices':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run offline GitHub/OpenAI stand-ins")
+    parser.add_argument('--repos', default="fake-org/repo-1", help="comma-separated owner/name list")
+    parser.add_argument('--github-port', type=int, default=8081)
+    parser.add_argument('--openai-port', type=int, default=8082)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=5000)
+    parser.add_argument('--churn', type=float, default=5.0, help="seconds between new commits (0 disables)")
+    parser.add_argument('--llm-latency', type=float, default=0.2)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = FakeConfig(latency=args.latency, error_rate=args.error_rate, rate_limit=args.rate_limit,
+                        churn_interval=args.churn, llm_latency=args.llm_latency,
+                        llm_error_rate=args.llm_error_rate)
+    services = FakeServices([r.strip() for r in args.repos.split(',') if r.strip()], config,
+                            github_port=args.github_port, openai_port=args.openai_port).start()
+    print(f"🧪 Fake services running")
+    print(f"   GITHUB_API_URL={services.github_url}")
+    print(f"   OPENAI_BASE_URL={services.openai_url}")
+    print(f"   GITHUB_REPOS={args.repos}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        services.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,62 +2,100 @@
 Furious-NYL: Parent Agent
 Coordinates between child agents and manages message flow
 """
+import os
 import threading
-import time
-from datetime import datetime
-from typing import Dict, Optional, List
-from queue import Queue
-from openai import OpenAI
+from typing import Callable, Dict, Optional, List, Tuple
+from openai_client import shared_client
+from analysis_cache import AnalysisCache
+from analysis_batcher import AnalysisBatcher
+from analysis_pool import AnalysisPool
+from report_history import ReportHistory
+from report_model import Report
+from metrics import OPENAI_BUDGET_USED, PARENT_MESSAGES, QUEUE_DEPTH
+from token_budget import TokenBudget
+from agent_logging import fields, get_logger
+
+log = get_logger("furious_nyl")
+
+# Metric label for reports received from Ar-Nab-h
+AR_NAB_H_REPORTS = "ar_nab_h.reports"
 
 
 class FuriousNYL:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, analysis_cache: Optional[AnalysisCache] = None):
         self.api_key = api_key
-        self.client = OpenAI(api_key=api_key)
+        # Shared with both child agents; openai is imported on the first completion
+        self.client = shared_client(api_key)
         self.model = "gpt-4o-mini"
         
-        # Message queues for inter-agent communication
-        self.ar_nab_h_queue: Queue = Queue()
-        self.spoon_tu_queue: Queue = Queue()
+        # GPT result cache shared by both child agents
+        self.analysis_cache = analysis_cache or AnalysisCache.from_env()
+        
+        # Per-minute/per-day token budgets and prompt size cap for every GPT call
+        self.token_budget = TokenBudget.from_env()
+        
+        # Coalesces analysis requests from every monitor into batched GPT calls
+        self.analysis_batcher = AnalysisBatcher.from_env(self.client, self.model, budget=self.token_budget)
+        
+        # Bounded workers that analyze and report changes off the polling threads
+        self.analysis_pool = AnalysisPool.from_env()
+        
+        # Stream GPT output token by token instead of waiting for full completions
+        self.streaming = os.getenv('LLM_STREAMING', 'false').lower() == 'true'
+        
+        # Every Ar-Nab-h report, in a bounded ring read through per-consumer cursors
+        self.reports = ReportHistory.from_env()
+        
+        QUEUE_DEPTH.set_function(lambda: self.analysis_pool.pending, queue="analysis_pool")
+        QUEUE_DEPTH.set_function(lambda: self.analysis_batcher.pending, queue="analysis_batch")
+        QUEUE_DEPTH.set_function(lambda: len(self.reports), queue="report_history")
+        OPENAI_BUDGET_USED.set_function(lambda: self.token_budget.used()['minute'], window="minute")
+        OPENAI_BUDGET_USED.set_function(lambda: self.token_budget.used()['day'], window="day")
         
-        # Store latest messages
-        self.latest_ar_nab_h_message: Optional[Dict] = None
         self.is_running = True
+        self._stop_event = threading.Event()
         
-        print(f"\n🔥 {datetime.now().strftime('%H:%M:%S')} - Parent Agent 'Furious-NYL' initialized")
-        print("=" * 80)
+        log.info("🔥 Parent Agent 'Furious-NYL' initialized")
     
     def process_ar_nab_h_message(self, message: Dict) -> None:
         """Store and process message from Ar-Nab-h agent"""
-        self.latest_ar_nab_h_message = message
-        print(f"\n📨 {datetime.now().strftime('%H:%M:%S')} - Parent received from Ar-Nab-h:")
-        print(f"   Repository: {message.get('repository', 'Unknown')}")
-        print(f"   Changes Detected: {message.get('changes_detected', False)}")
-        if message.get('changes_detected'):
-            print(f"   ⚠️  Modified Files: {len(message.get('modified_files', []))}")
+        self.reports.append(message)
+        PARENT_MESSAGES.inc(topic=AR_NAB_H_REPORTS)
+        log.info("📨 Parent received from Ar-Nab-h", extra=fields(
+            repository=message.get('repository', 'Unknown'),
+            changes_detected=message.get('changes_detected', False),
+            modified_files=len(message.get('modified_files', []))
+        ))
     
-    def get_latest_ar_nab_h_message(self) -> Optional[Dict]:
+    def get_latest_ar_nab_h_message(self) -> Optional[Report]:
         """Return the latest message from Ar-Nab-h"""
-        return self.latest_ar_nab_h_message
+        return self.reports.latest()
     
-    def send_to_ar_nab_h(self, message: Dict) -> None:
-        """Send message to Ar-Nab-h queue"""
-        self.ar_nab_h_queue.put(message)
+    def read_ar_nab_h_messages(self, cursor: int = 0) -> Tuple[int, List[Report]]:
+        """Return (new cursor, every report after cursor) without blocking"""
+        return self.reports.read(cursor)
     
-    def send_to_spoon_tu(self, message: Dict) -> None:
-        """Send message to Spoon-tu queue"""
-        self.spoon_tu_queue.put(message)
+    def wait_for_ar_nab_h_messages(self, cursor: int = 0, timeout: Optional[float] = None,
+                                   is_active: Optional[Callable[[], bool]] = None) -> Optional[Tuple[int, List[Report]]]:
+        """Block until Ar-Nab-h reports after cursor exist; returns (new cursor, reports)"""
+        return self.reports.wait(cursor, timeout=timeout, is_active=is_active)
     
     def shutdown(self) -> None:
         """Gracefully shutdown the parent agent"""
         self.is_running = False
-        print(f"\n🛑 {datetime.now().strftime('%H:%M:%S')} - Parent Agent shutting down...")
+        self._stop_event.set()
+        self.reports.close()
+        self.analysis_pool.shutdown()
+        self.analysis_batcher.shutdown()
+        log.info("🛑 Parent Agent shutting down...")
     
     def run(self) -> None:
-        """Main loop for parent agent - just maintains state"""
-        print(f"\n✅ Parent Agent 'Furious-NYL' is active and monitoring child agents...")
+        """Main loop for parent agent - sleeps until shutdown, all work is event-driven"""
+        log.info("✅ Parent Agent 'Furious-NYL' is active and monitoring child agents...")
+        # Agents are up: import openai now rather than on the first detected change
+        if self.api_key:
+            self.client.warm()
         try:
-            while self.is_running:
-                time.sleep(1)
+            self._stop_event.wait()
         except KeyboardInterrupt:
             self.shutdown()
@@ -0,0 +1,194 @@
+"""
+Git Mirror: Local change source for Ar-Nab-h
+Keeps a bare mirror of a repository current with incremental `git fetch`
+and answers the questions Ar-Nab-h asks the REST API (head, new commits,
+changed files) from local object data, so a cycle makes no REST calls.
+Remotes can be any URL git understands, including file:// for testing.
+"""
+import os
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+from agent_logging import fields, get_logger
+from metrics import GIT_FETCH_LATENCY, GIT_FETCHES
+
+log = get_logger("git_mirror")
+
+# %x1f separates fields, %x1e ends a record (neither appears in normal commit text)
+_LOG_FORMAT = "%H%x1f%an%x1f%ae%x1f%aI%x1f%cn%x1f%cI%x1f%B%x1e"
+
+# git --name-status letters as GitHub compare statuses
+_STATUS = {'A': 'added', 'M': 'modified', 'D': 'removed', 'R': 'renamed',
+           'C': 'copied', 'T': 'changed'}
+
+
+class GitMirror:
+    def __init__(self, remote_url: str, path: str, branch: Optional[str] = None,
+                 timeout: float = 120, max_diff_bytes: int = 20 * 1024 * 1024):
+        self.remote_url = remote_url
+        self.path = path
+        self.branch = branch
+        self.timeout = timeout
+        self.max_diff_bytes = max_diff_bytes
+
+    @classmethod
+    def for_repo(cls, repo) -> 'GitMirror':
+        """Mirror for a RepoConfig from GIT_REMOTE_URL ({owner}/{name} template) and GIT_MIRROR_DIR"""
+        template = os.getenv('GIT_REMOTE_URL', 'https://github.com/{owner}/{name}.git')
+        mirror_dir = os.getenv('GIT_MIRROR_DIR', 'mirrors')
+        return cls(
+            template.format(owner=repo.owner, name=repo.name),
+            os.path.join(mirror_dir, f"{repo.owner}__{repo.name}.git"),
+            branch=os.getenv('GIT_MIRROR_BRANCH') or None,
+            timeout=float(os.getenv('GIT_TIMEOUT', '120'))
+        )
+
+    def _git(self, *args: str) -> str:
+        """Run a git command against the mirror and return its stdout"""
+        result = subprocess.run(
+            ['git', '--git-dir', self.path, *args],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=self.timeout
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"git {args[0]} failed: {result.stderr.decode(errors='replace').strip()}")
+        return result.stdout.decode('utf-8', errors='replace')
+
+    def refs(self) -> Dict[str, str]:
+        """Map of ref name to object SHA"""
+        output = self._git('for-each-ref', '--format=%(objectname) %(refname)')
+        pairs = (line.split(' ', 1) for line in output.splitlines() if line)
+        return {ref: sha for sha, ref in pairs}
+
+    def sync(self) -> bool:
+        """Clone the mirror on first use, otherwise fetch; returns True if any ref moved"""
+        started = time.perf_counter()
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                subprocess.run(
+                    ['git', 'clone', '--mirror', '--quiet', self.remote_url, self.path],
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=self.timeout, check=True
+                )
+                log.info("🪞 Git mirror created", extra=fields(remote=self.remote_url, path=self.path))
+                GIT_FETCHES.inc(outcome="cloned")
+                return True
+            before = self.refs()
+            self._git('fetch', '--prune', '--quiet', 'origin')
+            changed = self.refs() != before
+            GIT_FETCHES.inc(outcome="updated" if changed else "unchanged")
+            return changed
+        except Exception:
+            GIT_FETCHES.inc(outcome="error")
+            raise
+        finally:
+            GIT_FETCH_LATENCY.observe(time.perf_counter() - started)
+
+    def head_ref(self) -> str:
+        """Ref of the monitored branch (the remote's default branch unless configured)"""
+        if self.branch:
+            return f"refs/heads/{self.branch}"
+        return self._git('symbolic-ref', 'HEAD').strip()
+
+    def head_sha(self) -> Optional[str]:
+        return self.refs().get(self.head_ref())
+
+    def has_commit(self, sha: str) -> bool:
+        try:
+            self._git('cat-file', '-e', f"{sha}^{{commit}}")
+            return True
+        except RuntimeError:
+            return False
+
+    def log(self, head: str, exclude: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Commits reachable from head but not exclude, newest first, shaped like GitHub's commits API"""
+        args = ['log', f"--max-count={limit}", f"--format={_LOG_FORMAT}", head]
+        if exclude:
+            args.append(f"^{exclude}")
+        commits = []
+        for record in self._git(*args).split('\x1e'):
+            record = record.strip('\n')
+            if not record:
+                continue
+            sha, author, email, authored, committer, committed, message = record.split('\x1f', 6)
+            commits.append({
+                'sha': sha,
+                'commit': {
+                    'message': message.strip(),
+                    'author': {'name': author, 'email': email, 'date': authored},
+                    'committer': {'name': committer, 'date': committed}
+                }
+            })
+        return commits
+
+    def repo_data(self) -> Dict:
+        """Minimal stand-in for the repository endpoint"""
+        head = self.head_sha()
+        if not head:
+            return {}
+        committed = self._git('log', '-1', '--format=%cI', head).strip()
+        return {'default_branch': self.head_ref().rsplit('/', 1)[-1], 'updated_at': committed,
+                'pushed_at': committed}
+
+    def _read_diff(self, base: str, head: str) -> str:
+        """Full patch text for base...head, cut off at max_diff_bytes"""
+        process = subprocess.Popen(
+            ['git', '--git-dir', self.path, 'diff', '--no-color', '-M', f"{base}...{head}"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        try:
+            data = process.stdout.read(self.max_diff_bytes)
+        finally:
+            process.kill()
+            process.wait()
+        return data.decode('utf-8', errors='replace')
+
+    def _patches(self, base: str, head: str, patch_limit: int) -> List[str]:
+        """Hunks of each file in diff order, truncated to patch_limit characters"""
+        patches = []
+        for block in self._read_diff(base, head).split('\ndiff --git '):
+            hunk_start = block.find('\n@@')
+            patches.append(block[hunk_start + 1:][:patch_limit] if hunk_start >= 0 else '')
+        return patches
+
+    def compare(self, base: str, head: str, max_files: int = 50, patch_limit: int = 1500) -> Dict:
+        """Changed files and aggregate stats for base...head, like Ar-Nab-h's compare summary"""
+        statuses = self._git('diff', '--name-status', '-z', '-M', f"{base}...{head}").split('\0')
+        numstats = self._git('diff', '--numstat', '-z', '-M', f"{base}...{head}").split('\0')
+
+        files = []
+        i = 0
+        while i < len(statuses) and statuses[i]:
+            letter = statuses[i][0]
+            if letter in 'RC':
+                filename = statuses[i + 2]
+                i += 3
+            else:
+                filename = statuses[i + 1]
+                i += 2
+            files.append({'filename': filename, 'status': _STATUS.get(letter, 'modified'),
+                          'additions': 0, 'deletions': 0, 'patch': ''})
+
+        # numstat -z: "add\tdel\tpath\0", or "add\tdel\t\0old\0new\0" for renames
+        j = 0
+        for entry in files:
+            if j >= len(numstats) or not numstats[j]:
+                break
+            additions, deletions, path = numstats[j].split('\t', 2)
+            j += 1 if path else 3
+            # Binary files report "-" for both counts
+            entry['additions'] = int(additions) if additions.isdigit() else 0
+            entry['deletions'] = int(deletions) if deletions.isdigit() else 0
+
+        for entry, patch in zip(files[:max_files], self._patches(base, head, patch_limit)):
+            entry['patch'] = patch
+
+        return {
+            'changed_files': files[:max_files],
+            'diff_stats': {
+                'files_changed': len(files),
+                'additions': sum(f['additions'] for f in files),
+                'deletions': sum(f['deletions'] for f in files),
+                'total_commits': int(self._git('rev-list', '--count', f"{base}..{head}").strip() or 0)
+            }
+        }
@@ -0,0 +1,110 @@
+"""
+GitHub Session: Shared HTTP transport
+Pooled keep-alive session with retries/backoff and per-request latency counters
+"""
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+
+from metrics import GITHUB_LATENCY, GITHUB_REQUESTS
+
+if TYPE_CHECKING:
+    import requests
+
+
+class GitHubSession:
+    def __init__(self, pool_size: int = 10, max_retries: int = 3,
+                 backoff_factor: float = 0.5, timeout: float = 10):
+        # Imported here so modules that only reference the session load fast
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'Connection': 'keep-alive',
+            'User-Agent': 'Ar-Nab-h-monitor'
+        })
+
+        # Retry idempotent requests on connection errors and transient 5xx;
+        # 304 and 403/429 rate-limit answers are returned to the caller as-is
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Latency counters
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.error_count = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+
+    @classmethod
+    def from_env(cls) -> 'GitHubSession':
+        """Build a session from GITHUB_POOL_SIZE / GITHUB_MAX_RETRIES / GITHUB_API_TIMEOUT"""
+        return cls(
+            pool_size=int(os.getenv('GITHUB_POOL_SIZE', '10')),
+            max_retries=int(os.getenv('GITHUB_MAX_RETRIES', '3')),
+            timeout=float(os.getenv('GITHUB_API_TIMEOUT', '10'))
+        )
+
+    def get(self, url: str, params: Optional[Dict] = None,
+            headers: Optional[Dict] = None, timeout: Optional[float] = None,
+            **kwargs) -> 'requests.Response':
+        """Issue a GET over the pooled connection and record its latency"""
+        start = time.perf_counter()
+        try:
+            response = self.session.get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=timeout if timeout is not None else self.timeout,
+                **kwargs
+            )
+            GITHUB_REQUESTS.inc(status=response.status_code)
+            return response
+        except Exception:
+            GITHUB_REQUESTS.inc(status="error")
+            with self._lock:
+                self.error_count += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            GITHUB_LATENCY.observe(elapsed)
+            with self._lock:
+                self.request_count += 1
+                self.total_latency += elapsed
+                self.last_latency = elapsed
+                if elapsed > self.max_latency:
+                    self.max_latency = elapsed
+
+    def stats(self) -> Dict:
+        """Return a snapshot of the latency counters (milliseconds)"""
+        with self._lock:
+            count = self.request_count
+            return {
+                'requests': count,
+                'errors': self.error_count,
+                'avg_latency_ms': round(self.total_latency / count * 1000, 2) if count else 0.0,
+                'max_latency_ms': round(self.max_latency * 1000, 2),
+                'last_latency_ms': round(self.last_latency * 1000, 2)
+            }
+
+    def close(self) -> None:
+        """Close all pooled connections"""
+        self.session.close()
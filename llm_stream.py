@@ -0,0 +1,136 @@
+"""
+LLM Stream: Token-by-token GPT completions
+A completion runs in a background thread and appends each delta to a
+TokenStream, which readers follow as it grows. The caller gets the stream
+back immediately, so nothing waits for the full completion.
+"""
+import threading
+import time
+from typing import Callable, Iterator, List, Optional
+
+from metrics import OPENAI_FIRST_TOKEN, observe_completion
+from token_budget import TokenBudget, estimate_tokens
+from agent_logging import fields, get_logger
+
+log = get_logger("llm_stream")
+
+
+class TokenStream:
+    """Append-only completion text that any number of readers can follow"""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.error: Optional[Exception] = None
+        self.started_at = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self._chunks: List[str] = []
+        self._condition = threading.Condition()
+        self._done = False
+
+    def write(self, text: str) -> None:
+        """Append a chunk and wake readers"""
+        if not text:
+            return
+        with self._condition:
+            if self.first_token_at is None:
+                self.first_token_at = time.monotonic()
+            self._chunks.append(text)
+            self._condition.notify_all()
+
+    def close(self, error: Optional[Exception] = None) -> None:
+        """Mark the stream complete (optionally failed) and release readers"""
+        with self._condition:
+            self.error = error
+            self._done = True
+            self._condition.notify_all()
+
+    def __iter__(self) -> Iterator[str]:
+        """Yield every chunk from the start, blocking until more arrive or the stream closes"""
+        index = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: index < len(self._chunks) or self._done)
+                chunks = self._chunks[index:]
+                done = self._done
+            index += len(chunks)
+            yield from chunks
+            if done and not chunks:
+                return
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the stream closes; returns False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._done, timeout=timeout)
+
+    @property
+    def done(self) -> bool:
+        with self._condition:
+            return self._done
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Seconds from start to the first chunk, if one has arrived"""
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    def text(self) -> str:
+        """Return everything received so far"""
+        with self._condition:
+            return ''.join(self._chunks)
+
+
+def stream_completion(client, model: str, prompt: str, max_tokens: int = 200,
+                      temperature: float = 0.7, label: str = "",
+                      on_complete: Optional[Callable[[str], None]] = None,
+                      fallback: Optional[Callable[[], str]] = None,
+                      operation: str = "stream", budget: Optional[TokenBudget] = None) -> TokenStream:
+    """
+    Start a streamed chat completion and return its TokenStream at once.
+    on_complete receives the full text after a successful completion; on
+    failure, or when the token budget is exhausted, the fallback text (if
+    any) is written before the stream closes.
+    """
+    stream = TokenStream(label)
+    reserved = budget.reserve_for(prompt, max_tokens, operation) if budget is not None else None
+    if budget is not None and reserved is None:
+        if fallback is not None:
+            stream.write(fallback())
+        stream.close()
+        return stream
+
+    def run():
+        started = time.perf_counter()
+        try:
+            response = client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+                timeout=30
+            )
+            for chunk in response:
+                if chunk.choices:
+                    stream.write(chunk.choices[0].delta.content or "")
+            observe_completion(operation, started)
+            if stream.time_to_first_token is not None:
+                OPENAI_FIRST_TOKEN.observe(stream.time_to_first_token, operation=operation)
+            text = stream.text()
+            if budget is not None:
+                # Streamed chunks carry no usage; settle to the local estimate
+                budget.settle(reserved, estimate_tokens(prompt) + estimate_tokens(text))
+            if on_complete is not None and text:
+                on_complete(text)
+            stream.close()
+        except Exception as e:
+            observe_completion(operation, started, error=True)
+            if budget is not None:
+                budget.settle(reserved, estimate_tokens(prompt) + estimate_tokens(stream.text()))
+            log.warning(f"⚠️ Streamed GPT completion failed: {type(e).__name__}", extra=fields(label=label))
+            if fallback is not None and not stream.text():
+                stream.write(fallback())
+            stream.close(error=e)
+
+    threading.Thread(target=run, name=f"LLM-Stream-{label}", daemon=True).start()
+    return stream
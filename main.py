@@ -2,13 +2,26 @@
 Main Orchestrator for Multi-Agent System
 Coordinates parent agent and child agents
 """
-import threading
 import time
+_STARTED = time.perf_counter()  # before the agent imports, for --profile-startup
+
+import os
+import sys
+import threading
 import getpass
 from datetime import datetime
 from furious_nyl import FuriousNYL
 from ar_nab_h import ArNabH
 from spoon_tu import SpoonTu
+from github_session import GitHubSession
+from repo_registry import load_registry
+from repo_scheduler import RepoScheduler
+from sharded_runtime import ShardedRuntime
+from adaptive_poll import RateLimitState
+from baseline_store import BaselineStore
+from webhook_receiver import WebhookReceiver, reconcile_interval, webhooks_enabled
+import metrics
+from startup_profile import StartupProfile
 
 
 def get_api_key() -> str:
@@ -33,33 +46,76 @@ def get_api_key() -> str:
 
 def main():
     """Main entry point for the multi-agent system"""
+    profile = StartupProfile.from_argv(started=_STARTED)
+    profile.mark("imports")
     print("\n" + "=" * 80)
     print("🚀 MULTI-AGENT SYSTEM INITIALIZATION")
     print("=" * 80)
     
+    metrics_exporter = None
+    webhook_receiver = None
     try:
         # Get API key from user
         api_key = get_api_key()
+        profile.wait("API key prompt")
         
         print(f"\n✅ API key received (length: {len(api_key)} characters)")
         print("=" * 80)
         
+        # Optional /metrics endpoint (METRICS_PORT) and textfile dump (METRICS_FILE)
+        metrics_server, metrics_exporter = metrics.start_from_env()
+        if metrics_server:
+            host, port = metrics_server.server_address[:2]
+            print(f"📈 Metrics available at http://{host}:{port}/metrics")
+        profile.mark("metrics")
+        
+        # Single event loop runtime instead of agent threads
+        if '--async' in sys.argv:
+            import async_engine
+            async_engine.main(api_key)
+            return
+        
         # Initialize parent agent
         print("\n1️⃣  Initializing Parent Agent...")
         parent_agent = FuriousNYL(api_key=api_key)
+        profile.mark("parent agent")
         
         # Initialize child agents
         print("\n2️⃣  Initializing Child Agents...")
-        ar_nab_h = ArNabH(api_key=api_key, parent_agent=parent_agent)
+        repos = load_registry()
+        if webhooks_enabled():
+            # Pushes arrive by webhook; polling only reconciles missed deliveries
+            for repo in repos:
+                repo.interval = max(repo.interval, reconcile_interval())
+        max_concurrency = int(os.getenv('MONITOR_MAX_CONCURRENCY', '4'))
+        shards = int(os.getenv('MONITOR_SHARDS', '1'))
+        baseline_store = BaselineStore.from_env()
+        if shards > 1 and len(repos) > 1:
+            # Monitors run in shard processes; reports come back to this parent
+            ar_nab_h_scheduler = ShardedRuntime(repos, shards, api_key, parent_agent,
+                                                max_concurrency=max_concurrency)
+        else:
+            github_session = GitHubSession.from_env()
+            rate_state = RateLimitState()
+            monitors = [
+                ArNabH(api_key=api_key, parent_agent=parent_agent, session=github_session,
+                       repo=repo, announce=len(repos) == 1, rate_state=rate_state,
+                       store=baseline_store)
+                for repo in repos
+            ]
+            ar_nab_h_scheduler = RepoScheduler(monitors, max_concurrency=max_concurrency)
         spoon_tu = SpoonTu(api_key=api_key, parent_agent=parent_agent)
+        webhook_receiver = WebhookReceiver.from_env(ar_nab_h_scheduler)
+        profile.mark("child agents")
         
         print("\n" + "=" * 80)
         print("🎯 AGENT SYSTEM READY")
         print("=" * 80)
         print("\nAgent Configuration:")
         print("  • Parent Agent: Furious-NYL (Coordinator)")
-        print("  • Child Agent 1: Ar-Nab-h (GitHub Monitor - 10s interval)")
-        print("  • Child Agent 2: Spoon-tu (Message Formatter - 11s interval)")
+        shard_note = f", {ar_nab_h_scheduler.shards} processes" if isinstance(ar_nab_h_scheduler, ShardedRuntime) else ""
+        print(f"  • Child Agent 1: Ar-Nab-h (GitHub Monitor - {len(repos)} repositories{shard_note})")
+        print("  • Child Agent 2: Spoon-tu (Message Formatter - event-driven)")
         print(f"\nStarting at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("\nPress Ctrl+C to stop the system gracefully")
         print("=" * 80)
@@ -77,7 +133,7 @@ def main():
         
         # Ar-Nab-h agent thread
         ar_nab_h_thread = threading.Thread(
-            target=ar_nab_h.run,
+            target=ar_nab_h_scheduler.run,
             name="Ar-Nab-h",
             daemon=False
         )
@@ -94,6 +150,10 @@ def main():
         # Start all threads
         for thread in threads:
             thread.start()
+        if webhook_receiver:
+            webhook_receiver.start()
+        profile.mark("threads started")
+        profile.print_report()
         
         # Wait for all threads to complete
         for thread in threads:
@@ -112,18 +172,29 @@ def main():
         # Signal all agents to stop
         try:
             parent_agent.shutdown()
-            ar_nab_h.shutdown()
+            ar_nab_h_scheduler.shutdown()
             spoon_tu.shutdown()
+            if webhook_receiver:
+                webhook_receiver.shutdown()
         except:
             pass
         
         # Wait a moment for clean shutdown
         time.sleep(2)
+        
+        # Fold the write-ahead log back into the baseline database
+        try:
+            baseline_store.compact()
+        except Exception:
+            pass
+        if metrics_exporter:
+            metrics_exporter.stop()
         print("\n✅ All agents have been shut down")
         
     except ValueError as e:
+        # Empty API key, unknown REPORT_FORMAT, malformed GITHUB_REPOS, non-numeric settings...
         print(f"\n❌ Configuration Error: {e}")
-        print("Please provide a valid API key.")
+        print("Please check the value above (API key or .env settings) and try again.")
     except Exception as e:
         print(f"\n❌ Fatal Error: {e}")
         print("Please check your configuration and try again.")
@@ -0,0 +1,404 @@
+"""
+Metrics: Counters, gauges and histograms for the agent hot paths
+Updates go to a per-thread shard that only its own thread writes, so the
+hot path takes no lock; shards are summed when metrics are collected, and
+shards of finished threads are folded into a retired total.
+Exposed as Prometheus text on a local /metrics endpoint (METRICS_PORT) and
+as a periodically rewritten textfile (METRICS_FILE).
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from agent_logging import get_logger
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelKey, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base class: one named metric with fixed label names"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return "\n".join(lines)
+
+
+class _Sharded(_Metric):
+    """Keeps one dict per writing thread; the owning thread is its only writer"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict]] = []
+        self._retired: Dict[LabelKey, object] = {}
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = {}
+            self._local.shard = shard
+            with self._shards_lock:
+                # Short-lived threads (streams, webhook requests) would otherwise leave a shard each
+                self._retire_finished()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_finished(self) -> None:
+        """Fold the shards of finished threads into the retired totals; caller holds the lock"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+                continue
+            # A finished thread can no longer write, so its shard is stable
+            for key, value in shard.items():
+                self._retired[key] = self._merge(self._retired.get(key), value)
+        self._shards = live
+
+    @staticmethod
+    def _merge(total, value):
+        raise NotImplementedError
+
+    def _snapshot(self) -> List[List[Tuple[LabelKey, object]]]:
+        """Copy every shard, retrying if a writer resizes one mid-copy"""
+        with self._shards_lock:
+            self._retire_finished()
+            shards = [shard for _, shard in self._shards]
+            copies = [[(key, self._copy(value)) for key, value in self._retired.items()]]
+        for shard in shards:
+            while True:
+                try:
+                    copies.append([(key, self._copy(value)) for key, value in list(shard.items())])
+                    break
+                except RuntimeError:
+                    continue
+        return copies
+
+    @staticmethod
+    def _copy(value):
+        return list(value) if isinstance(value, list) else value
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    @staticmethod
+    def _merge(total, value):
+        return (total or 0) + value
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        return sum(value for shard in self._snapshot() for k, value in shard if k == key)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        totals: Dict[LabelKey, float] = {}
+        for shard in self._snapshot():
+            for key, value in shard:
+                totals[key] = totals.get(key, 0) + value
+        return [(self.name, _format_labels(self.labelnames, key), value)
+                for key, value in sorted(totals.items())]
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        # [bucket counts..., +Inf count, sum]
+        entry = shard.get(key)
+        if entry is None:
+            entry = [0] * (len(self.buckets) + 1) + [0.0]
+            shard[key] = entry
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[i] += 1
+                break
+        else:
+            entry[len(self.buckets)] += 1
+        entry[-1] += value
+
+    @staticmethod
+    def _merge(total, value):
+        if total is None:
+            return list(value)
+        return [a + b for a, b in zip(total, value)]
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        totals: Dict[LabelKey, List[float]] = {}
+        for shard in self._snapshot():
+            for key, entry in shard:
+                total = totals.setdefault(key, [0] * len(entry))
+                for i, value in enumerate(entry):
+                    total[i] += value
+
+        samples = []
+        bounds = list(self.buckets) + [float('inf')]
+        for key, entry in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, entry):
+                cumulative += count
+                le = f'le="{_format_value(bound) if bound == float("inf") else bound}"'
+                samples.append((f"{self.name}_bucket", _format_labels(self.labelnames, key, le), cumulative))
+            samples.append((f"{self.name}_sum", _format_labels(self.labelnames, key), entry[-1]))
+            samples.append((f"{self.name}_count", _format_labels(self.labelnames, key), cumulative))
+        return samples
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        # Plain assignment is atomic, so last-writer-wins needs no lock
+        self._values: Dict[LabelKey, float] = {}
+        self._functions: Dict[LabelKey, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], float], **labels) -> None:
+        """Read the value from function() at collection time (e.g. a queue depth)"""
+        self._functions[self._key(labels)] = function
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        values = dict(self._values)
+        for key, function in list(self._functions.items()):
+            try:
+                values[key] = float(function())
+            except Exception:
+                continue
+        return [(self.name, _format_labels(self.labelnames, key), value)
+                for key, value in sorted(values.items())]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Return every metric in Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# GitHub
+GITHUB_REQUESTS = REGISTRY.counter(
+    "github_requests_total", "GitHub API requests by status code", ["status"])
+GITHUB_LATENCY = REGISTRY.histogram(
+    "github_request_seconds", "GitHub API request latency")
+GIT_FETCHES = REGISTRY.counter(
+    "git_mirror_fetches_total", "Git mirror clones and fetches by outcome", ["outcome"])
+GIT_FETCH_LATENCY = REGISTRY.histogram(
+    "git_mirror_fetch_seconds", "Git mirror clone/fetch duration")
+
+# OpenAI
+OPENAI_REQUESTS = REGISTRY.counter(
+    "openai_requests_total", "OpenAI completions by operation and outcome", ["operation", "outcome"])
+OPENAI_LATENCY = REGISTRY.histogram(
+    "openai_request_seconds", "OpenAI completion latency", ["operation"],
+    buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0))
+OPENAI_TOKENS = REGISTRY.counter(
+    "openai_tokens_total", "OpenAI tokens used", ["operation", "kind"])
+OPENAI_BUDGET = REGISTRY.counter(
+    "openai_budget_decisions_total", "Token budget reservations by operation and decision",
+    ["operation", "decision"])
+OPENAI_BUDGET_USED = REGISTRY.gauge(
+    "openai_budget_tokens_used", "Tokens counted against the budget window", ["window"])
+OPENAI_FIRST_TOKEN = REGISTRY.histogram(
+    "openai_first_token_seconds", "Time to first streamed token", ["operation"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0))
+
+# Caches and queues
+CACHE_REQUESTS = REGISTRY.counter(
+    "analysis_cache_requests_total", "Analysis cache lookups", ["result"])
+QUEUE_DEPTH = REGISTRY.gauge(
+    "queue_depth", "Pending items per queue", ["queue"])
+QUEUE_EVENTS = REGISTRY.counter(
+    "queue_events_total", "Queue submissions, coalesces and drops", ["queue", "event"])
+PARENT_MESSAGES = REGISTRY.counter(
+    "parent_messages_total", "Messages received by the parent agent", ["topic"])
+
+# Agents
+CYCLE_DURATION = REGISTRY.histogram(
+    "agent_cycle_seconds", "Duration of one agent cycle", ["agent"])
+CHANGES_DETECTED = REGISTRY.counter(
+    "monitor_changes_total", "Monitoring cycles by outcome", ["repository", "outcome"])
+POLL_INTERVAL = REGISTRY.gauge(
+    "monitor_poll_interval_seconds", "Adaptive poll interval per repository", ["repository"])
+GITHUB_RATE_REMAINING = REGISTRY.gauge(
+    "github_rate_limit_remaining", "X-RateLimit-Remaining of the last GitHub response")
+WEBHOOK_EVENTS = REGISTRY.counter(
+    "webhook_events_total", "GitHub webhook deliveries by event and outcome", ["event", "outcome"])
+REPORTS_DISPLAYED = REGISTRY.counter(
+    "reports_displayed_total", "Reports displayed by Spoon-tu", ["formatter"])
+
+
+def observe_completion(operation: str, started: float, response=None, error: bool = False) -> None:
+    """Record latency, outcome and token usage of one OpenAI completion"""
+    OPENAI_LATENCY.observe(time.perf_counter() - started, operation=operation)
+    OPENAI_REQUESTS.inc(operation=operation, outcome="error" if error else "ok")
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        OPENAI_TOKENS.inc(getattr(usage, 'prompt_tokens', 0) or 0, operation=operation, kind="prompt")
+        OPENAI_TOKENS.inc(getattr(usage, 'completion_tokens', 0) or 0, operation=operation, kind="completion")
+
+
+def start_http_server(port: int, host: str = "127.0.0.1",
+                      registry: MetricsRegistry = REGISTRY) -> 'ThreadingHTTPServer':
+    """Serve /metrics on a daemon thread"""
+    # http.server is only imported when the endpoint is enabled
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="Metrics-HTTP", daemon=True).start()
+    return server
+
+
+class TextfileExporter:
+    """Periodically rewrites a Prometheus textfile (node_exporter textfile collector format)"""
+
+    def __init__(self, path: str, interval: float = 15.0, registry: MetricsRegistry = REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self) -> None:
+        """Write the current metrics atomically"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(self.registry.render())
+        os.replace(temp_path, self.path)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                get_logger("metrics").warning(f"⚠️ Failed to write metrics file: {e}")
+
+    def start(self) -> 'TextfileExporter':
+        self._thread = threading.Thread(target=self._run, name="Metrics-Textfile", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the exporter after one final write"""
+        self._stop_event.set()
+        try:
+            self.write()
+        except Exception:
+            pass
+
+
+def start_from_env() -> Tuple[Optional['ThreadingHTTPServer'], Optional[TextfileExporter]]:
+    """Start the /metrics server (METRICS_PORT) and textfile dump (METRICS_FILE) if configured"""
+    server = exporter = None
+    port = os.getenv('METRICS_PORT')
+    if port:
+        server = start_http_server(int(port), os.getenv('METRICS_HOST', '127.0.0.1'))
+    path = os.getenv('METRICS_FILE')
+    if path:
+        exporter = TextfileExporter(path, float(os.getenv('METRICS_DUMP_INTERVAL', '15'))).start()
+    return server, exporter
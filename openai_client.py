@@ -0,0 +1,64 @@
+"""
+OpenAI Client: One lazily built client shared by every agent
+`openai` takes about a second to import, so it is kept off the startup path:
+the client is built on first use, or warmed on a background thread once the
+agents are running so the first detected change doesn't pay for the import.
+Agents that never call GPT (demos, setup checks) never pay it.
+"""
+import threading
+from typing import Dict
+
+from agent_logging import get_logger
+
+log = get_logger("openai_client")
+
+_clients: Dict[str, 'LazyOpenAI'] = {}
+_clients_lock = threading.Lock()
+
+
+class LazyOpenAI:
+    """Stands in for openai.OpenAI; builds the real client on first attribute access"""
+    __slots__ = ('_api_key', '_client', '_lock')
+
+    def __init__(self, api_key: str):
+        self._api_key = api_key
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_built(self) -> bool:
+        return self._client is not None
+
+    def get(self):
+        """Return the real OpenAI client, importing openai on first use"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    self._client = OpenAI(api_key=self._api_key)
+        return self._client
+
+    def warm(self) -> threading.Thread:
+        """Import openai and build the client on a daemon thread"""
+        thread = threading.Thread(target=self._warm, name="OpenAI-Warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def _warm(self) -> None:
+        try:
+            self.get()
+        except Exception as e:
+            # The first completion retries and falls back as usual
+            log.warning(f"⚠️ OpenAI client warm-up failed: {type(e).__name__}: {e}")
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+
+def shared_client(api_key: str) -> LazyOpenAI:
+    """The process-wide client for api_key (one connection pool for all agents)"""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _clients[api_key] = LazyOpenAI(api_key)
+        return client
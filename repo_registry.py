@@ -0,0 +1,108 @@
+"""
+Repository Registry: Which repositories Ar-Nab-h monitors
+Loads repositories from a JSON file (GITHUB_REPOS_FILE), a comma-separated
+list (GITHUB_REPOS), or the single GITHUB_REPO_OWNER / GITHUB_REPO_NAME pair
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+DEFAULT_REPO_OWNER = "SChat9994u"
+DEFAULT_REPO_NAME = "PairProgramming"
+DEFAULT_BASELINE_FILE = "baseline.json"
+
+
+@dataclass
+class RepoConfig:
+    owner: str
+    name: str
+    interval: float = 10.0  # seconds
+    jitter: float = 1.0  # seconds of random delay added to each interval
+    baseline_file: Optional[str] = None  # legacy JSON baseline, imported into the store once
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.owner}/{self.name}"
+
+
+def _parse_repo(spec: str, defaults: Dict) -> RepoConfig:
+    """Parse 'owner/name' or 'owner/name:interval'"""
+    spec = spec.strip()
+    interval = defaults.get('interval', 10.0)
+    if ':' in spec:
+        spec, interval_text = spec.rsplit(':', 1)
+        interval = float(interval_text)
+    if spec.count('/') != 1:
+        raise ValueError(f"Invalid repository '{spec}', expected owner/name")
+    owner, name = spec.split('/')
+    return RepoConfig(
+        owner=owner,
+        name=name,
+        interval=float(interval),
+        jitter=float(defaults.get('jitter', 1.0))
+    )
+
+
+def _load_file(path: str, defaults: Dict) -> List[RepoConfig]:
+    """
+    Load a registry file:
+        {"defaults": {"interval": 30, "jitter": 5},
+         "repos": ["owner/name", {"repo": "owner/other", "interval": 60}]}
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    defaults = dict(defaults, **data.get('defaults', {}))
+    repos = []
+    for entry in data.get('repos', []):
+        if isinstance(entry, str):
+            repos.append(_parse_repo(entry, defaults))
+            continue
+        config = _parse_repo(entry['repo'], defaults)
+        config.interval = float(entry.get('interval', config.interval))
+        config.jitter = float(entry.get('jitter', config.jitter))
+        config.baseline_file = entry.get('baseline_file')
+        repos.append(config)
+    return repos
+
+
+def load_registry(path: Optional[str] = None, specs: Optional[List[str]] = None) -> List[RepoConfig]:
+    """Return the configured (or given 'owner/name' specs) repositories, each with its own legacy baseline file path"""
+    defaults = {
+        'interval': float(os.getenv('AR_NAB_H_CHECK_INTERVAL', '10')),
+        'jitter': float(os.getenv('AR_NAB_H_CHECK_JITTER', '1')),
+    }
+
+    path = path or os.getenv('GITHUB_REPOS_FILE')
+    if specs:
+        repos = [_parse_repo(spec, defaults) for spec in specs]
+    elif path:
+        repos = _load_file(path, defaults)
+    elif os.getenv('GITHUB_REPOS'):
+        repos = [_parse_repo(spec, defaults)
+                 for spec in os.getenv('GITHUB_REPOS').split(',') if spec.strip()]
+    else:
+        repos = [RepoConfig(
+            owner=os.getenv('GITHUB_REPO_OWNER', DEFAULT_REPO_OWNER),
+            name=os.getenv('GITHUB_REPO_NAME', DEFAULT_REPO_NAME),
+            interval=defaults['interval'],
+            jitter=defaults['jitter']
+        )]
+
+    # Drop duplicates, keeping the first definition
+    unique: Dict[str, RepoConfig] = {}
+    for config in repos:
+        unique.setdefault(config.full_name.lower(), config)
+    repos = list(unique.values())
+
+    # A single repository keeps the historical baseline.json location
+    baseline_dir = os.getenv('BASELINE_DIR', 'baselines')
+    for config in repos:
+        if config.baseline_file:
+            continue
+        if len(repos) == 1:
+            config.baseline_file = DEFAULT_BASELINE_FILE
+        else:
+            config.baseline_file = os.path.join(baseline_dir, f"{config.owner}__{config.name}.json")
+    return repos
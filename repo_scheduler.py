@@ -0,0 +1,198 @@
+"""
+Repo Scheduler: Drives Ar-Nab-h monitors for many repositories
+A single scheduler thread hands due repositories to a bounded worker pool,
+honouring per-repo intervals with jitter and a shared GitHub rate-limit budget
+"""
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from agent_logging import fields, get_logger
+
+log = get_logger("repo_scheduler")
+
+
+class RateBudget:
+    """Token bucket shared by all monitors: `limit` requests per `window` seconds"""
+
+    def __init__(self, limit: int = 60, window: float = 3600):
+        self.limit = limit
+        self.window = window
+        self.tokens = float(limit)
+        self.updated_at = time.monotonic()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_env(cls) -> 'RateBudget':
+        """Build a budget from GITHUB_RATE_LIMIT (60 unauthenticated, 5000 with a token)"""
+        return cls(limit=int(os.getenv('GITHUB_RATE_LIMIT', '60')))
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        rate = self.limit / self.window
+        self.tokens = min(float(self.limit), self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+
+    def acquire(self, cost: float = 1, stop_event: Optional[threading.Event] = None) -> bool:
+        """Block until `cost` tokens are available; returns False if stopped first"""
+        with self._condition:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                self._refill()
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return True
+                wait = (cost - self.tokens) * self.window / self.limit
+                self._condition.wait(timeout=min(wait, 1.0))
+
+    def try_acquire(self, cost: float = 1) -> bool:
+        """Take `cost` tokens if available without blocking"""
+        with self._condition:
+            self._refill()
+            if self.tokens >= cost:
+                self.tokens -= cost
+                return True
+            return False
+
+    def available(self) -> float:
+        """Return the number of requests currently available"""
+        with self._condition:
+            self._refill()
+            return self.tokens
+
+
+class RepoScheduler:
+    def __init__(self, monitors: List, max_concurrency: int = 4,
+                 budget: Optional[RateBudget] = None):
+        self.monitors = monitors
+        self.max_concurrency = max_concurrency
+        self.budget = budget or RateBudget.from_env()
+
+        # (due_time, tiebreak, monitor index); entries whose due time no longer
+        # matches _due[index] were superseded by trigger() and are skipped
+        self._queue: List = []
+        self._due: Dict[int, float] = {}
+        self._running = set()
+        self._rerun = set()
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._slots = threading.Semaphore(max_concurrency)
+        self._stop_event = threading.Event()
+        self._baselined = set()
+        self.is_running = False
+
+        log.info("🗓️ Repo scheduler initialized", extra=fields(
+            repositories=len(monitors),
+            max_concurrency=max_concurrency,
+            rate_budget=f"{self.budget.limit}/{int(self.budget.window)}s"
+        ))
+
+    def _schedule(self, index: int, delay: float) -> None:
+        """Queue a monitor to run after `delay` seconds"""
+        with self._condition:
+            due = time.monotonic() + delay
+            self._due[index] = due
+            heapq.heappush(self._queue, (due, next(self._counter), index))
+            self._condition.notify()
+
+    def trigger(self, full_name: str) -> bool:
+        """Check a repository as soon as possible (e.g. on a push webhook); False if unknown"""
+        for index, monitor in enumerate(self.monitors):
+            if monitor.repo.full_name.lower() == full_name.lower():
+                break
+        else:
+            return False
+        with self._condition:
+            if index in self._running:
+                # Check again right after the cycle in flight
+                self._rerun.add(index)
+            elif self._due.get(index, 0) > time.monotonic():
+                self._schedule(index, 0)
+        return True
+
+    def _next_delay(self, monitor) -> float:
+        """Adaptive interval plus random jitter so repos don't poll in lockstep"""
+        return monitor.effective_interval + random.uniform(0, monitor.repo.jitter)
+
+    def _next_due(self) -> Optional[int]:
+        """Block until a monitor is due; returns its index, or None on shutdown"""
+        with self._condition:
+            while not self._stop_event.is_set():
+                if not self._queue:
+                    self._condition.wait()
+                    continue
+                due, _, index = self._queue[0]
+                if self._due.get(index) != due:
+                    heapq.heappop(self._queue)
+                    continue
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(timeout=delay)
+                    continue
+                heapq.heappop(self._queue)
+                del self._due[index]
+                self._running.add(index)
+                return index
+        return None
+
+    def _run_monitor(self, index: int) -> None:
+        """Run one baseline or check cycle for a monitor and reschedule it"""
+        monitor = self.monitors[index]
+        try:
+            if index not in self._baselined:
+                if monitor.ensure_baseline():
+                    self._baselined.add(index)
+            else:
+                monitor.check_and_report()
+        except Exception as e:
+            log.error(f"❌ Cycle failed: {e}", extra=fields(repository=monitor.repo.full_name))
+        finally:
+            self._slots.release()
+            with self._condition:
+                self._running.discard(index)
+                rerun = index in self._rerun
+                self._rerun.discard(index)
+            if not self._stop_event.is_set():
+                self._schedule(index, 0 if rerun else self._next_delay(monitor))
+
+    def run(self) -> None:
+        """Main loop: dispatch due monitors to the worker pool"""
+        self.is_running = True
+        for index, monitor in enumerate(self.monitors):
+            # Spread initial baselines across the first jitter window
+            self._schedule(index, random.uniform(0, monitor.repo.jitter))
+
+        log.info(f"✅ Repo scheduler started - monitoring {len(self.monitors)} repositories")
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                thread_name_prefix="Ar-Nab-h") as executor:
+            while not self._stop_event.is_set():
+                index = self._next_due()
+                if index is None:
+                    break
+                self._slots.acquire()
+                cost = self.monitors[index].request_cost(index in self._baselined)
+                if cost and not self.budget.acquire(cost, stop_event=self._stop_event):
+                    self._slots.release()
+                    with self._condition:
+                        self._running.discard(index)
+                    break
+                executor.submit(self._run_monitor, index)
+
+        self.is_running = False
+
+    def shutdown(self) -> None:
+        """Stop dispatching and shut down every monitor"""
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        for monitor in self.monitors:
+            monitor.is_running = False
+        stats = self.monitors[0].session.stats() if self.monitors else {}
+        log.info("🛑 Repo scheduler shutting down...", extra=fields(**stats))
@@ -0,0 +1,96 @@
+"""
+Report History: Fixed-capacity ring buffer of Ar-Nab-h reports
+Reports are stored as frozen report_model.Report records (interned
+repository names, commit SHAs as bytes) and read through per-consumer
+cursors, so every consumer sees every report exactly once while memory
+stays bounded.
+"""
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from metrics import QUEUE_EVENTS
+from report_model import Report
+
+
+class ReportHistory:
+    def __init__(self, capacity: int = 256):
+        self.capacity = max(1, capacity)
+        self._ring: List[Optional[Report]] = [None] * self.capacity
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._closed = False
+
+    @classmethod
+    def from_env(cls) -> 'ReportHistory':
+        """Build a history from REPORT_HISTORY_SIZE"""
+        return cls(capacity=int(os.getenv('REPORT_HISTORY_SIZE', '256')))
+
+    def append(self, message: Dict) -> int:
+        """Store a report, overwriting the oldest when full; returns its sequence number"""
+        report = Report.from_message(message)
+        with self._condition:
+            self._sequence += 1
+            self._ring[self._sequence % self.capacity] = report
+            self._condition.notify_all()
+            return self._sequence
+
+    def latest(self) -> Optional[Report]:
+        """Return the newest report without blocking"""
+        with self._condition:
+            return self._ring[self._sequence % self.capacity] if self._sequence else None
+
+    def _read(self, cursor: int, limit: Optional[int]) -> Tuple[int, List[Report]]:
+        oldest = max(1, self._sequence - self.capacity + 1)
+        if cursor + 1 < oldest:
+            # The consumer fell a full ring behind; the skipped reports are gone
+            QUEUE_EVENTS.inc(oldest - cursor - 1, queue="report_history", event="overrun")
+            cursor = oldest - 1
+        end = self._sequence if limit is None else min(self._sequence, cursor + limit)
+        records = [self._ring[seq % self.capacity] for seq in range(cursor + 1, end + 1)]
+        return end, records
+
+    def read(self, cursor: int = 0, limit: Optional[int] = None) -> Tuple[int, List[Report]]:
+        """Return (new cursor, reports after cursor) without blocking"""
+        with self._condition:
+            return self._read(cursor, limit)
+
+    def wait(self, cursor: int = 0, timeout: Optional[float] = None, limit: Optional[int] = None,
+             is_active: Optional[Callable[[], bool]] = None) -> Optional[Tuple[int, List[Report]]]:
+        """
+        Block until reports newer than cursor exist and return (new cursor, reports).
+        Returns None on timeout, when the history is closed, or when
+        is_active() turns false after a wake().
+        """
+        def ready():
+            if self._closed or (is_active is not None and not is_active()):
+                return True
+            return self._sequence > cursor
+
+        with self._condition:
+            if not self._condition.wait_for(ready, timeout=timeout):
+                return None
+            if self._closed or (is_active is not None and not is_active()):
+                return None
+            return self._read(cursor, limit)
+
+    def wake(self) -> None:
+        """Wake all readers so they re-check their is_active predicate"""
+        with self._condition:
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """Release every blocked reader"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the most recently stored report"""
+        with self._condition:
+            return self._sequence
+
+    def __len__(self) -> int:
+        with self._condition:
+            return min(self._sequence, self.capacity)
@@ -0,0 +1,187 @@
+"""
+Report Model: Immutable Ar-Nab-h reports
+Frozen, slotted Report/Commit records built once when a report is published.
+Both are read-only mappings, so code written against the report dicts keeps
+working, while equality is a precomputed content-hash comparison and
+serialization to JSON (or msgpack, when installed) is a single call.
+"""
+import json
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from analysis_cache import content_key
+
+try:
+    import msgpack
+except ImportError:  # optional: pip install msgpack
+    msgpack = None
+
+_COMMIT_KEYS = ('sha', 'message', 'author', 'date')
+# Report keys held as fields; any other key of a published message lands in `extras`
+_REPORT_FIELDS = ('repository', 'changes_detected', 'check_time', 'new_commits', 'modified_files',
+                  'current_hash', 'gpt_analysis', 'analysis_stream')
+
+
+def pack_sha(sha: str) -> bytes:
+    """Full or abbreviated hex SHA as bytes (half the size when the length is even)"""
+    try:
+        return bytes.fromhex(sha) if len(sha) % 2 == 0 else sha.encode('ascii')
+    except (ValueError, UnicodeEncodeError):
+        return sha.encode()
+
+
+def unpack_sha(packed: bytes, length: int) -> str:
+    return packed.hex() if len(packed) * 2 == length else packed.decode()
+
+
+@dataclass(frozen=True, eq=False)
+class Commit(Mapping):
+    """One entry of a report's modified_files"""
+    __slots__ = ('packed_sha', 'sha_length', 'message', 'author', 'date')
+    packed_sha: bytes
+    sha_length: int
+    message: str
+    author: str
+    date: str
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Commit':
+        sha = data.get('sha', '')
+        return cls(pack_sha(sha), len(sha), data.get('message', ''),
+                   sys.intern(data.get('author', 'Unknown')), data.get('date', ''))
+
+    @property
+    def sha(self) -> str:
+        return unpack_sha(self.packed_sha, self.sha_length)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _COMMIT_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_COMMIT_KEYS)
+
+    def __len__(self) -> int:
+        return len(_COMMIT_KEYS)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Commit):
+            return (self.packed_sha, self.message, self.author, self.date) == \
+                (other.packed_sha, other.message, other.author, other.date)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.packed_sha, self.message, self.author, self.date))
+
+    def to_dict(self) -> Dict:
+        return {'sha': self.sha, 'message': self.message, 'author': self.author, 'date': self.date}
+
+
+@dataclass(frozen=True, eq=False)
+class Report(Mapping):
+    """
+    A published Ar-Nab-h report. Two reports are equal when they describe
+    the same content (check_time is ignored), compared by content_hash.
+    """
+    __slots__ = ('repository', 'changes_detected', 'check_time', 'new_commits', 'commits',
+                 'current_hash', 'gpt_analysis', 'extras', 'analysis_stream', 'content_hash')
+    repository: str
+    changes_detected: bool
+    check_time: str
+    new_commits: Optional[int]
+    commits: Tuple[Commit, ...]
+    current_hash: Optional[str]
+    gpt_analysis: Optional[str]
+    extras: Dict  # remaining JSON-safe keys (reason, not_modified, changed_files, ...)
+    analysis_stream: Any  # live TokenStream; never serialized or hashed
+
+    def __post_init__(self):
+        # content_hash is a slot, not a field: computed once here
+        object.__setattr__(self, 'content_hash', content_key(self, 'format'))
+
+    @classmethod
+    def from_message(cls, message: Dict) -> 'Report':
+        """Freeze a report dict as built by Ar-Nab-h"""
+        if isinstance(message, Report):
+            return message
+        return cls(
+            repository=sys.intern(message.get('repository', 'Unknown')),
+            changes_detected=bool(message.get('changes_detected')),
+            check_time=message.get('check_time', ''),
+            new_commits=message.get('new_commits'),
+            commits=tuple(Commit.from_dict(f) for f in message.get('modified_files', [])),
+            current_hash=message.get('current_hash'),
+            gpt_analysis=message.get('gpt_analysis'),
+            extras={key: value for key, value in message.items() if key not in _REPORT_FIELDS},
+            analysis_stream=message.get('analysis_stream')
+        )
+
+    def _keys(self) -> Iterator[str]:
+        yield 'repository'
+        yield 'changes_detected'
+        yield 'check_time'
+        if self.new_commits is not None:
+            yield 'new_commits'
+        yield 'modified_files'
+        if self.current_hash is not None:
+            yield 'current_hash'
+        if self.gpt_analysis is not None:
+            yield 'gpt_analysis'
+        if self.analysis_stream is not None:
+            yield 'analysis_stream'
+        yield from self.extras
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'modified_files':
+            return self.commits
+        if key in _REPORT_FIELDS:
+            value = getattr(self, key)
+            if value is None and key not in ('repository', 'changes_detected', 'check_time'):
+                raise KeyError(key)
+            return value
+        return self.extras[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return self._keys()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._keys())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Report):
+            return self.content_hash == other.content_hash
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.content_hash)
+
+    def __reduce__(self):
+        # Frozen slots can't be restored attribute by attribute; rebuild instead
+        return (Report.from_message, (self.to_dict(),))
+
+    def to_dict(self) -> Dict:
+        """Plain, serializable dict (the live analysis_stream is left out)"""
+        data = {key: self[key] for key in self._keys() if key != 'analysis_stream'}
+        data['modified_files'] = [commit.to_dict() for commit in self.commits]
+        return data
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text: str) -> 'Report':
+        return cls.from_message(json.loads(text))
+
+    def to_msgpack(self) -> bytes:
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed (pip install msgpack)")
+        return msgpack.packb(self.to_dict(), use_bin_type=True)
+
+    @classmethod
+    def from_msgpack(cls, data: bytes) -> 'Report':
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed (pip install msgpack)")
+        return cls.from_message(msgpack.unpackb(data, raw=False))
@@ -0,0 +1,190 @@
+"""
+Report Renderer: Local template engine for Spoon-tu reports
+Precompiled templates and pluggable sections render a monitoring message as
+plain text, ANSI-coloured text, JSON or Markdown in microseconds, with no
+network round-trip
+"""
+import json
+import os
+from string import Template
+from typing import Callable, Dict, List, Optional, Tuple
+
+# A section turns a message into (title, lines), or None to be skipped
+Section = Callable[[Dict], Optional[Tuple[str, List[str]]]]
+
+# Templates are compiled once at import, per output format
+TEMPLATES: Dict[str, Dict[str, Template]] = {
+    'plain': {
+        'heading': Template("$title:"),
+        'item': Template("  $text"),
+        'separator': Template(""),
+    },
+    'ansi': {
+        'heading': Template("\033[1;36m$title:\033[0m"),
+        'item': Template("  $text"),
+        'separator': Template(""),
+    },
+    'markdown': {
+        'heading': Template("### $title"),
+        'item': Template("- $text"),
+        'separator': Template(""),
+    },
+}
+
+FORMATS = ('plain', 'ansi', 'json', 'markdown')
+BULLET = "• "
+
+
+def status_section(message: Dict) -> Tuple[str, List[str]]:
+    changes_status = "✅ Changes Detected" if message.get('changes_detected') else "✅ No Changes"
+    return "Repository Status", [
+        f"📦 Repository: {message.get('repository', 'Unknown')}",
+        changes_status,
+        f"📊 New Commits: {message.get('new_commits', 0)}",
+        f"⏰ Check Time: {message.get('check_time', 'Unknown')}",
+    ]
+
+
+def system_section(message: Dict) -> Tuple[str, List[str]]:
+    return "System Status", [
+        "✅ All agents operational",
+        "✅ GitHub API accessible",
+        "✅ Monitoring system operational",
+    ]
+
+
+def commits_section(message: Dict) -> Optional[Tuple[str, List[str]]]:
+    commits = message.get('modified_files')
+    if not commits:
+        return None
+    return "Recent Commits", [
+        f"{BULLET}[{c.get('sha', 'N/A')}] {c.get('message', 'N/A')}"
+        + (f" by {c['author']}" if c.get('author') else "")
+        for c in commits
+    ]
+
+
+def files_section(message: Dict, limit: int = 10) -> Optional[Tuple[str, List[str]]]:
+    changed_files = message.get('changed_files')
+    if not changed_files:
+        return None
+    stats = message.get('diff_stats', {})
+    lines = [
+        f"{BULLET}{f.get('filename')} ({f.get('status')}, +{f.get('additions', 0)}/-{f.get('deletions', 0)})"
+        for f in changed_files[:limit]
+    ]
+    hidden = stats.get('files_changed', len(changed_files)) - len(lines)
+    if hidden > 0:
+        lines.append(f"… and {hidden} more")
+    title = (f"Changed Files ({stats.get('files_changed', len(changed_files))}, "
+             f"+{stats.get('additions', 0)}/-{stats.get('deletions', 0)})")
+    return title, lines
+
+
+def analysis_section(message: Dict) -> Optional[Tuple[str, List[str]]]:
+    analysis = message.get('gpt_analysis')
+    if not analysis or not message.get('changes_detected'):
+        return None
+    return "Analysis", [line for line in analysis.strip().splitlines() if line.strip()]
+
+
+DEFAULT_SECTIONS: List[Tuple[str, Section]] = [
+    ('status', status_section),
+    ('commits', commits_section),
+    ('files', files_section),
+    ('analysis', analysis_section),
+    ('system', system_section),
+]
+
+
+class ReportRenderer:
+    def __init__(self, output_format: str = 'plain',
+                 sections: Optional[List[Tuple[str, Section]]] = None):
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown report format '{output_format}', expected one of {FORMATS}")
+        self.output_format = output_format
+        self.sections: List[Tuple[str, Section]] = list(sections or DEFAULT_SECTIONS)
+
+    @classmethod
+    def from_env(cls) -> 'ReportRenderer':
+        """Build a renderer from REPORT_FORMAT (plain, ansi, json, markdown)"""
+        return cls(os.getenv('REPORT_FORMAT', 'plain').lower())
+
+    def register_section(self, name: str, section: Section, before: Optional[str] = None) -> None:
+        """Add or replace a section, optionally placing it before another one"""
+        self.sections = [(n, s) for n, s in self.sections if n != name]
+        index = len(self.sections)
+        if before is not None:
+            names = [n for n, _ in self.sections]
+            if before in names:
+                index = names.index(before)
+        self.sections.insert(index, (name, section))
+
+    def remove_section(self, name: str) -> None:
+        self.sections = [(n, s) for n, s in self.sections if n != name]
+
+    def heading(self, title: str) -> str:
+        """Render a single section heading (used for streamed sections)"""
+        return TEMPLATES.get(self.output_format, TEMPLATES['plain'])['heading'].substitute(title=title)
+
+    @property
+    def indent(self) -> str:
+        """Prefix for lines of free text inside a section"""
+        return "" if self.output_format == 'markdown' else "  "
+
+    def _collect(self, message: Dict) -> List[Tuple[str, str, List[str]]]:
+        collected = []
+        for name, section in self.sections:
+            result = section(message)
+            if result:
+                collected.append((name,) + tuple(result))
+        return collected
+
+    def _structured(self, message: Dict) -> Dict:
+        """The report as plain fields, for consumers of the json format"""
+        document = {
+            'repository': message.get('repository'),
+            'check_time': message.get('check_time'),
+            'changes_detected': bool(message.get('changes_detected')),
+            'new_commits': int(message.get('new_commits') or 0),
+            'commits': [
+                {'sha': c.get('sha'), 'message': c.get('message'), 'author': c.get('author')}
+                for c in message.get('modified_files') or []
+            ],
+            'changed_files': [
+                {'filename': f.get('filename'), 'status': f.get('status'),
+                 'additions': f.get('additions', 0), 'deletions': f.get('deletions', 0)}
+                for f in message.get('changed_files') or []
+            ],
+            'analysis': (message.get('gpt_analysis') or None) if message.get('changes_detected') else None,
+        }
+        if message.get('diff_stats'):
+            document['diff_stats'] = dict(message['diff_stats'])
+        # Sections registered beyond the defaults have no field of their own
+        default_names = {name for name, _ in DEFAULT_SECTIONS}
+        custom = [(name, section) for name, section in self.sections if name not in default_names]
+        if custom:
+            document['sections'] = {
+                name: {'title': title, 'lines': lines}
+                for name, title, lines in ReportRenderer('plain', custom)._collect(message)
+            }
+        return document
+
+    def render(self, message: Dict) -> str:
+        """Render a monitoring message in the configured format"""
+        if self.output_format == 'json':
+            return json.dumps(self._structured(message), ensure_ascii=False)
+
+        sections = self._collect(message)
+
+        templates = TEMPLATES[self.output_format]
+        heading, item, separator = templates['heading'], templates['item'], templates['separator']
+        out: List[str] = [""]
+        for _, title, lines in sections:
+            out.append(heading.substitute(title=title))
+            if self.output_format == 'markdown':
+                # Markdown list items bring their own bullet
+                lines = [line[len(BULLET):] if line.startswith(BULLET) else line for line in lines]
+            out.extend(item.substitute(text=line) for line in lines)
+            out.append(separator.substitute())
+        return "\n".join(out)
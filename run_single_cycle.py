@@ -6,17 +6,22 @@ import os
 import time
 from datetime import datetime
 
+_STARTED = time.perf_counter()
+
 # Add project to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 def run_single_cycle():
     """Run one complete cycle with actual API"""
+    from startup_profile import StartupProfile
+    profile = StartupProfile.from_argv(started=_STARTED)
     
     # Get API key from environment or prompt user
     api_key = os.getenv('OPENAI_API_KEY')
     if not api_key:
         import getpass
         api_key = getpass.getpass("Enter your OpenAI API key: ")
+    profile.wait("API key")
     
     print("\n" + "=" * 80)
     print("🚀 MULTI-AGENT SYSTEM - SINGLE CYCLE WITH REAL API")
@@ -26,6 +31,8 @@ def run_single_cycle():
     from furious_nyl import FuriousNYL
     from ar_nab_h import ArNabH
     from spoon_tu import SpoonTu
+    from github_session import GitHubSession
+    profile.mark("agent imports")
     
     try:
         print(f"\n✅ API key received (length: {len(api_key)} characters)")
@@ -37,8 +44,10 @@ def run_single_cycle():
         
         # Initialize child agents
         print("\n2️⃣  Initializing Child Agents...")
-        ar_nab_h = ArNabH(api_key=api_key, parent_agent=parent_agent)
+        github_session = GitHubSession.from_env()
+        ar_nab_h = ArNabH(api_key=api_key, parent_agent=parent_agent, session=github_session)
         spoon_tu = SpoonTu(api_key=api_key, parent_agent=parent_agent)
+        profile.mark("agent construction")
         
         print("\n" + "=" * 80)
         print("🎯 AGENT SYSTEM READY - STARTING SINGLE CYCLE")
@@ -46,15 +55,18 @@ def run_single_cycle():
         
         # Create baseline if it doesn't exist
         print("\n📊 Checking baseline...")
-        if not os.path.exists('baseline.json'):
-            ar_nab_h.create_baseline()
-        else:
-            print("✅ Baseline already exists, skipping creation")
+        ar_nab_h.ensure_baseline()
+        profile.mark("baseline")
         
         # First monitoring check
         print(f"\n🔍 Performing GitHub API check...")
         ar_nab_h.check_and_report()
         
+        # Let the analysis pool finish the report
+        parent_agent.analysis_pool.join(timeout=90)
+        profile.mark("first check + analysis")
+        profile.print_report()
+        
         # Wait a moment
         time.sleep(2)
         
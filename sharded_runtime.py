@@ -0,0 +1,178 @@
+"""
+Sharded Runtime: Ar-Nab-h monitors spread across worker processes
+Repositories are assigned to N shard processes on a consistent-hash ring,
+so a repository stays on its shard as the set grows. Each shard runs its
+own RepoScheduler and monitors (and so its own GIL); reports come back to
+the single Furious-NYL in the main process over a multiprocessing queue.
+"""
+import bisect
+import hashlib
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Dict, List, Optional
+
+from agent_logging import fields, get_logger
+
+log = get_logger("sharded_runtime")
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes; adding a shard moves ~1/N of the keys"""
+
+    def __init__(self, nodes: List[int], replicas: int = 100):
+        self._ring = sorted((self._hash(f"{node}:{i}"), node) for node in nodes for i in range(replicas))
+        self._hashes = [point for point, _ in self._ring]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+    def node_for(self, key: str):
+        index = bisect.bisect(self._hashes, self._hash(key.lower())) % len(self._hashes)
+        return self._ring[index][1]
+
+
+def _run_shard(shard_id: int, shards: int, repos: List, api_key: str, max_concurrency: int, rate_limit: int,
+               reports, commands, stop_event) -> None:
+    """Shard process entry point: monitor `repos` until stop_event is set"""
+    # Ctrl+C reaches the whole process group; the main process coordinates shutdown
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Each shard persists its own analysis cache: one shared file would be rewritten
+    # through the same tmp file by every process, last writer wins
+    if os.getenv('ANALYSIS_CACHE_FILE'):
+        os.environ['ANALYSIS_CACHE_FILE'] = f"{os.environ['ANALYSIS_CACHE_FILE']}.shard{shard_id}"
+
+    from adaptive_poll import RateLimitState
+    from ar_nab_h import ArNabH
+    from baseline_store import BaselineStore
+    from furious_nyl import FuriousNYL
+    from github_session import GitHubSession
+    from repo_scheduler import RateBudget, RepoScheduler
+    from report_model import Report
+
+    class ShardParent(FuriousNYL):
+        """Shard-local parent: analyzes locally, forwards finished reports to the main process"""
+
+        def process_ar_nab_h_message(self, message: Dict) -> None:
+            reports.put(Report.from_message(message).to_dict())
+
+    parent = ShardParent(api_key=api_key)
+    parent.streaming = False  # a live token stream can't cross the process boundary
+    parent.token_budget.split(shards)  # shards share the OpenAI token quota like the GitHub one
+    session = GitHubSession.from_env()
+    store = BaselineStore.from_env()
+    rate_state = RateLimitState()
+    rate_state.split(shards)  # every shard sees the same X-RateLimit-Remaining
+    monitors = [
+        ArNabH(api_key=api_key, parent_agent=parent, session=session, repo=repo,
+               announce=False, rate_state=rate_state, store=store)
+        for repo in repos
+    ]
+    scheduler = RepoScheduler(monitors, max_concurrency=max_concurrency, budget=RateBudget(limit=rate_limit))
+
+    def forward_commands():
+        while not stop_event.is_set():
+            try:
+                scheduler.trigger(commands.get(timeout=0.5))
+            except queue.Empty:
+                continue
+
+    if api_key:
+        parent.client.warm()
+    threading.Thread(target=forward_commands, name=f"Shard-{shard_id}-Commands", daemon=True).start()
+    runner = threading.Thread(target=scheduler.run, name=f"Shard-{shard_id}", daemon=True)
+    runner.start()
+    log.info("🧩 Shard started", extra=fields(shard=shard_id, pid=os.getpid(), repositories=len(repos)))
+
+    stop_event.wait()
+    scheduler.shutdown()
+    runner.join(timeout=10)
+    parent.analysis_pool.join(timeout=30)
+    parent.shutdown()
+    store.close()
+    session.close()
+
+
+class ShardedRuntime:
+    """Drop-in replacement for RepoScheduler that runs the monitors in shard processes"""
+
+    def __init__(self, repos: List, shards: int, api_key: str, parent_agent,
+                 max_concurrency: int = 4, rate_limit: Optional[int] = None):
+        self.repos = repos
+        self.shards = max(1, min(shards, len(repos)))
+        self.api_key = api_key
+        self.parent_agent = parent_agent
+        self.max_concurrency = max_concurrency
+        # Each shard gets an equal slice of the GitHub request budget
+        total_limit = rate_limit or int(os.getenv('GITHUB_RATE_LIMIT', '60'))
+        self.shard_rate_limit = max(1, total_limit // self.shards)
+
+        self.ring = HashRing(list(range(self.shards)))
+        self.assignment: Dict[str, int] = {repo.full_name.lower(): self.ring.node_for(repo.full_name)
+                                           for repo in repos}
+
+        # spawn: shard processes must not inherit the parent's running threads
+        self._context = multiprocessing.get_context('spawn')
+        self._reports = self._context.Queue()
+        self._commands = [self._context.Queue() for _ in range(self.shards)]
+        self._stop_event = self._context.Event()
+        self._processes: List = []
+        self.is_running = False
+
+        log.info("🧩 Sharded runtime initialized", extra=fields(
+            shards=self.shards, repositories=len(repos),
+            per_shard=[sum(1 for s in self.assignment.values() if s == shard) for shard in range(self.shards)]
+        ))
+
+    def repos_for(self, shard: int) -> List:
+        return [repo for repo in self.repos if self.assignment[repo.full_name.lower()] == shard]
+
+    def trigger(self, full_name: str) -> bool:
+        """Ask the owning shard to check a repository now; False if unknown"""
+        shard = self.assignment.get(full_name.lower())
+        if shard is None:
+            return False
+        self._commands[shard].put(full_name)
+        return True
+
+    def run(self) -> None:
+        """Start the shard processes and hand their reports to the parent agent until they exit"""
+        self.is_running = True
+        for shard in range(self.shards):
+            process = self._context.Process(
+                target=_run_shard, name=f"Ar-Nab-h-shard-{shard}",
+                args=(shard, self.shards, self.repos_for(shard), self.api_key, self.max_concurrency,
+                      self.shard_rate_limit, self._reports, self._commands[shard], self._stop_event),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+        # Keep draining after shutdown: a process can't exit while its queue buffer is full
+        while any(process.is_alive() for process in self._processes) or not self._reports.empty():
+            try:
+                message = self._reports.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.parent_agent.process_ar_nab_h_message(message)
+            except Exception as e:
+                log.error(f"❌ Failed to process shard report: {e}")
+
+        self.is_running = False
+
+    def shutdown(self, timeout: float = 45) -> None:
+        """Stop every shard, terminating any that do not exit within timeout"""
+        self._stop_event.set()
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            process.join(timeout=max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                log.warning("⚠️ Shard did not stop in time, terminating", extra=fields(pid=process.pid))
+                process.terminate()
+        log.info("🛑 Sharded runtime shutting down...", extra=fields(shards=self.shards))
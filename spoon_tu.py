@@ -1,50 +1,66 @@
 """
 Spoon-tu: Child Agent
-Formats and displays messages from parent agent every 11 seconds
-Uses GPT 4o mini to create nicely formatted console output
+Formats and displays messages from parent agent as soon as they are published
+Renders reports locally from templates; GPT 4o mini formatting is opt-in
+(SPOON_TU_GPT_FORMAT=true)
 """
+import os
 import threading
 import time
 from datetime import datetime
 from typing import Optional, Dict
-from openai import OpenAI
+from openai_client import shared_client
+from analysis_cache import content_key
+from report_model import Report
+from report_renderer import ReportRenderer
+from llm_stream import TokenStream, stream_completion
+from metrics import CYCLE_DURATION, REPORTS_DISPLAYED, observe_completion
+from token_budget import fit_lines, truncate_to_tokens, usage_tokens
+from agent_logging import fields, get_logger, write_output
+
+log = get_logger("spoon_tu")
 
 
 class SpoonTu:
     def __init__(self, api_key: str, parent_agent):
         self.api_key = api_key
-        self.client = OpenAI(api_key=api_key)
+        self.client = shared_client(api_key)
         self.model = "gpt-4o-mini"
         self.parent_agent = parent_agent
+        self.renderer = ReportRenderer.from_env()
+        self.use_gpt_format = os.getenv('SPOON_TU_GPT_FORMAT', 'false').lower() == 'true'
         
         # Configuration
-        self.check_interval = 11  # seconds
         self.is_running = False
-        self.last_displayed_message: Optional[Dict] = None
+        self.last_displayed_keys: Dict[str, str] = {}  # repository -> content key
+        self.cursor = 0
         
-        print(f"\n📢 {datetime.now().strftime('%H:%M:%S')} - Child Agent 'Spoon-tu' initialized")
-        print(f"   Check Interval: {self.check_interval} seconds")
+        log.info("📢 Child Agent 'Spoon-tu' initialized", extra=fields(
+            mode="event-driven",
+            formatter=f"gpt:{self.model}" if self.use_gpt_format else self.renderer.output_format
+        ))
     
     def format_message_with_gpt(self, message: Dict) -> str:
         """Use GPT 4o mini to create a nicely formatted message"""
+        # Nothing changed: the local format says everything GPT would
+        if not message.get('changes_detected'):
+            return self._create_fallback_format(message)
+        
+        cache = self.parent_agent.analysis_cache
+        cache_key = content_key(message, 'format')
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Budget exhausted: the local format costs nothing
+        budget = self.parent_agent.token_budget
+        prompt = self.build_format_prompt(message)
+        reserved = budget.reserve_for(prompt, 400, "format")
+        if reserved is None:
+            return self._create_fallback_format(message)
+        
+        started = time.perf_counter()
         try:
-            prompt = f"""
-Create a beautifully formatted console report based on the following repository monitoring data:
-
-Repository: {message.get('repository', 'Unknown')}
-Check Time: {message.get('check_time', 'Unknown')}
-Changes Detected: {'✅ YES' if message.get('changes_detected') else '❌ NO'}
-Number of New Commits: {message.get('new_commits', 0)}
-
-{'Modified Files/Commits:' if message.get('modified_files') else ''}
-{chr(10).join([f"  • [{f.get('sha', 'N/A')}] {f.get('message', 'N/A')} by {f.get('author', 'Unknown')}" for f in message.get('modified_files', [])])}
-
-GPT Analysis:
-{message.get('gpt_analysis', 'No analysis available')}
-
-Please format this as a clear, visually appealing console report with appropriate sections, emojis, and formatting.
-"""
-            
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
@@ -52,82 +68,203 @@ Please format this as a clear, visually appealing console report with appropriat
                 temperature=0.9,
                 timeout=30
             )
+            observe_completion("format", started, response)
+            budget.settle(reserved, usage_tokens(response))
             
-            return response.choices[0].message.content
+            formatted = response.choices[0].message.content
+            cache.put(cache_key, formatted)
+            return formatted
         except Exception as e:
             # Fallback: Return a simple formatted message if GPT fails
-            print(f"   ⚠️  GPT formatting failed: {type(e).__name__}, using fallback format")
+            observe_completion("format", started, error=True)
+            budget.settle(reserved, 0)
+            log.warning(f"⚠️ GPT formatting failed: {type(e).__name__}, using fallback format")
             return self._create_fallback_format(message)
     
-    def _create_fallback_format(self, message: Dict) -> str:
-        """Create a simple formatted message without GPT"""
-        changes_status = "✅ Changes Detected" if message.get('changes_detected') else "✅ No Changes"
-        
-        output = f"""
-Repository Status:
-  📦 Repository: {message.get('repository', 'Unknown')}
-  {changes_status}
-  📊 New Commits: {message.get('new_commits', 0)}
-  ⏰ Check Time: {message.get('check_time', 'Unknown')}
+    def build_format_prompt(self, message: Dict) -> str:
+        """Build the GPT prompt for formatting a monitoring message, compacted to the token budget"""
+        # Commits, changed files and the analysis each get a third of the prompt
+        section_tokens = self.parent_agent.token_budget.max_prompt_tokens // 3
+        commits = fit_lines(
+            [f"  • [{f.get('sha', 'N/A')}] {f.get('message', 'N/A')} by {f.get('author', 'Unknown')}"
+             for f in message.get('modified_files', [])],
+            section_tokens, noun="commits"
+        )
+        changed_files = fit_lines(
+            [f"  • {f.get('filename')} ({f.get('status')}, +{f.get('additions', 0)}/-{f.get('deletions', 0)})"
+             for f in message.get('changed_files', [])],
+            section_tokens, noun="files"
+        )
+        analysis = truncate_to_tokens(message.get('gpt_analysis') or 'No analysis available', section_tokens)
+        return f"""
+Create a beautifully formatted console report based on the following repository monitoring data:
+
+Repository: {message.get('repository', 'Unknown')}
+Check Time: {message.get('check_time', 'Unknown')}
+Changes Detected: {'✅ YES' if message.get('changes_detected') else '❌ NO'}
+Number of New Commits: {message.get('new_commits', 0)}
+
+{'Modified Files/Commits:' if message.get('modified_files') else ''}
+{chr(10).join(commits)}
 
-System Status:
-  ✅ All agents operational
-  ✅ GitHub API accessible
-  ✅ Monitoring system operational
+{'Changed Files:' if message.get('changed_files') else ''}
+{chr(10).join(changed_files)}
+
+GPT Analysis:
+{analysis}
+
+Please format this as a clear, visually appealing console report with appropriate sections, emojis, and formatting.
 """
+    
+    def stream_format_with_gpt(self, message: Dict) -> Optional[TokenStream]:
+        """Start a streamed GPT format; returns None when a cached or local format applies"""
+        if not message.get('changes_detected'):
+            return None
         
-        if message.get('modified_files'):
-            output += "\nRecent Commits:\n"
-            for commit in message.get('modified_files', []):
-                output += f"  • [{commit.get('sha', 'N/A')}] {commit.get('message', 'N/A')}\n"
+        cache = self.parent_agent.analysis_cache
+        cache_key = content_key(message, 'format')
+        if cache.get(cache_key) is not None:
+            return None
         
-        return output
+        return stream_completion(
+            self.client,
+            self.model,
+            self.build_format_prompt(message),
+            max_tokens=400,
+            temperature=0.9,
+            label="format",
+            operation="format_stream",
+            on_complete=lambda text: cache.put(cache_key, text),
+            fallback=lambda: self._create_fallback_format(message),
+            budget=self.parent_agent.token_budget
+        )
+    
+    def _create_fallback_format(self, message: Dict) -> str:
+        """Create a formatted message without GPT"""
+        return self.renderer.render(message)
+    
+    def format_message(self, message: Dict) -> str:
+        """Format a message with the local renderer, or GPT when opted in"""
+        if self.use_gpt_format:
+            return self.format_message_with_gpt(message)
+        return self.renderer.render(message)
     
     def display_formatted_message(self, message: Dict) -> None:
         """Display the formatted message"""
-        if message == self.last_displayed_message:
-            print(f"\n⏳ {datetime.now().strftime('%H:%M:%S')} - No new messages from parent agent")
+        if not self.accept_message(message):
             return
         
-        self.last_displayed_message = message
+        with CYCLE_DURATION.time(agent="spoon_tu"):
+            self._display(message)
+        REPORTS_DISPLAYED.inc(formatter="gpt" if self.use_gpt_format else self.renderer.output_format)
+    
+    def _display(self, message: Dict) -> None:
+        """Format and print an accepted message, streaming where possible"""
+        stream = message.get('analysis_stream')
+        if stream is not None and (self.use_gpt_format or self.renderer.output_format == 'json'):
+            # These formats need the whole analysis before they can start
+            stream.wait(timeout=60)
+            message = dict(message, gpt_analysis=stream.text())
+            stream = None
+        
+        if self.use_gpt_format and self.parent_agent.streaming:
+            format_stream = self.stream_format_with_gpt(message)
+            if format_stream is not None:
+                self.print_streamed_report("", format_stream)
+                return
         
-        # Format message using GPT
-        formatted_output = self.format_message_with_gpt(message)
+        if stream is not None:
+            # Print the report now and the analysis token by token underneath
+            self.print_streamed_report(self.renderer.render(message), stream, heading="Analysis")
+            return
         
-        print("\n" + "=" * 80)
-        print(f"📋 FORMATTED REPOSITORY REPORT - {datetime.now().strftime('%H:%M:%S')}")
-        print("=" * 80)
-        print(formatted_output)
-        print("=" * 80)
+        self.print_report(self.format_message(message))
     
-    def check_for_messages(self) -> None:
-        """Check if parent agent has new messages"""
-        latest_message = self.parent_agent.get_latest_ar_nab_h_message()
+    def accept_message(self, message: Dict) -> bool:
+        """Record message as displayed; returns False if its repository's last report had the same content"""
+        # Compare on content, not identity: check_time changes every cycle.
+        # Keyed per repository, so reports interleaved from other repositories don't defeat it
+        if isinstance(message, Report):
+            message_key = message.content_hash
+        else:
+            message_key = content_key(message, 'format')
+        repository = message.get('repository', 'Unknown')
+        if self.last_displayed_keys.get(repository) == message_key:
+            log.debug("⏳ Report already displayed", extra=fields(repository=repository))
+            return False
         
-        if latest_message:
-            self.display_formatted_message(latest_message)
+        self.last_displayed_keys[repository] = message_key
+        return True
+    
+    def print_report(self, formatted_output: str) -> None:
+        """Print a formatted report to the console"""
+        # Reports are product output: written through the log listener so they
+        # don't interleave with log lines, but never filtered by LOG_LEVEL
+        if self.renderer.output_format == 'json' and not self.use_gpt_format:
+            # One JSON document per line, for piping into other tools
+            write_output(formatted_output + "\n")
         else:
-            print(f"\n⏳ {datetime.now().strftime('%H:%M:%S')} - Waiting for first message from Ar-Nab-h agent...")
+            bar = "=" * 80
+            write_output(f"\n{bar}\n📋 FORMATTED REPOSITORY REPORT - {datetime.now().strftime('%H:%M:%S')}\n"
+                         f"{bar}\n{formatted_output}\n{bar}\n")
+        log.debug("📋 Report displayed", extra=fields(event="report", report=formatted_output))
+    
+    def print_streamed_report(self, formatted_output: str, stream: TokenStream,
+                              heading: Optional[str] = None) -> None:
+        """Print a report whose last section arrives as a token stream"""
+        # Tokens go to the console as they arrive; the log gets the finished report
+        bar = "=" * 80
+        header = [f"\n{bar}", f"📋 FORMATTED REPOSITORY REPORT - {datetime.now().strftime('%H:%M:%S')}", bar]
+        if formatted_output:
+            header.append(formatted_output)
+        indent = ""
+        if heading:
+            header.append(self.renderer.heading(heading))
+            indent = self.renderer.indent
+        write_output("\n".join(header) + "\n" + indent)
+        for chunk in stream:
+            write_output(chunk.replace("\n", "\n" + indent))
+        footer = [""]
+        if stream.time_to_first_token is not None:
+            footer.append(f"   ⚡ First token after {stream.time_to_first_token:.2f}s")
+        footer.append(bar)
+        write_output("\n".join(footer) + "\n")
+        log.debug("📋 Streamed report complete", extra=fields(
+            event="report", streamed=True, first_token_seconds=stream.time_to_first_token,
+            analysis=stream.text()
+        ))
+    
+    def check_for_messages(self) -> None:
+        """Display every report published since the last check, without blocking"""
+        self.cursor, messages = self.parent_agent.read_ar_nab_h_messages(self.cursor)
+        if not messages:
+            log.info("⏳ No new reports from Ar-Nab-h agent")
+        for message in messages:
+            self.display_formatted_message(message)
     
     def run(self) -> None:
         """Main loop for Spoon-tu agent"""
         self.is_running = True
         
-        print(f"\n✅ Spoon-tu agent started - checking every {self.check_interval} seconds")
-        print("=" * 80)
+        log.info("✅ Spoon-tu agent started - waiting for reports from parent agent")
         
         try:
-            # Initial check
-            time.sleep(2)
-            self.check_for_messages()
-            
             while self.is_running:
-                time.sleep(self.check_interval)
-                self.check_for_messages()
+                # Blocks with no wakeups until Ar-Nab-h reports or shutdown
+                item = self.parent_agent.wait_for_ar_nab_h_messages(
+                    self.cursor,
+                    is_active=lambda: self.is_running
+                )
+                if item is None:
+                    break
+                self.cursor, messages = item
+                for message in messages:
+                    self.display_formatted_message(message)
         except KeyboardInterrupt:
             self.shutdown()
     
     def shutdown(self) -> None:
         """Gracefully shutdown the agent"""
         self.is_running = False
-        print(f"\n🛑 {datetime.now().strftime('%H:%M:%S')} - Spoon-tu agent shutting down...")
+        self.parent_agent.reports.wake()
+        log.info("🛑 Spoon-tu agent shutting down...")
@@ -0,0 +1,55 @@
+"""
+Startup Profile: Where cold-start time goes
+With --profile-startup, entry points print how long each startup phase took
+and which heavy dependencies were already imported when the agents were ready.
+Phases spent waiting on the user (the API key prompt) are shown but not
+counted in the total.
+"""
+import sys
+import time
+from typing import List, Optional, Tuple
+
+# Dependencies worth keeping off the startup path
+HEAVY_MODULES = ('openai', 'httpx', 'requests', 'urllib3', 'http.server', 'sqlite3')
+
+
+class StartupProfile:
+    def __init__(self, started: Optional[float] = None, enabled: bool = True):
+        self.started = started if started is not None else time.perf_counter()
+        self.enabled = enabled
+        self._last = self.started
+        self.phases: List[Tuple[str, float, bool]] = []  # (phase, seconds, counted)
+
+    @classmethod
+    def from_argv(cls, started: Optional[float] = None, argv: Optional[List[str]] = None) -> 'StartupProfile':
+        """Profile enabled by --profile-startup on the command line"""
+        return cls(started, enabled='--profile-startup' in (argv if argv is not None else sys.argv))
+
+    def mark(self, phase: str, counted: bool = True) -> None:
+        """Close the current phase under `phase`; counted=False keeps it out of the total"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last, counted))
+        self._last = now
+
+    def wait(self, phase: str) -> None:
+        """Close a phase spent waiting on the user, e.g. an interactive prompt"""
+        self.mark(phase, counted=False)
+
+    @property
+    def total(self) -> float:
+        return sum(seconds for _, seconds, counted in self.phases if counted)
+
+    def report(self) -> str:
+        lines = ["⏱️  STARTUP PROFILE"]
+        for phase, seconds, counted in self.phases:
+            lines.append(f"  {phase:<28} {seconds * 1000:9.1f} ms" + ("" if counted else "  (excluded)"))
+        lines.append(f"  {'total':<28} {self.total * 1000:9.1f} ms")
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        deferred = [name for name in HEAVY_MODULES if name not in sys.modules]
+        lines.append(f"  Imported: {', '.join(loaded) or 'none'}")
+        lines.append(f"  Deferred: {', '.join(deferred) or 'none'}")
+        return "\n".join(lines)
+
+    def print_report(self) -> None:
+        if self.enabled:
+            print("\n" + self.report(), flush=True)
@@ -0,0 +1,149 @@
+"""Tests for the SQLite/WAL baseline store"""
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from baseline_store import BaselineStore
+
+REPO = "octo/repo"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CRASHED = 3
+
+
+def save(store, head, new_shas=None, **kwargs):
+    store.save(REPO, "hash-" + head, head, {"etag": '"e"'}, [{"sha": head}], new_shas=new_shas, **kwargs)
+
+
+def run_child(db_path, body):
+    """Run code against the store in another process that dies without cleaning up"""
+    script = textwrap.dedent("""
+        import os, sys
+        sys.path.insert(0, {root!r})
+        from baseline_store import BaselineStore
+        store = BaselineStore({db!r})
+    """).format(root=ROOT, db=str(db_path)) + textwrap.dedent(body) + "os._exit({})\n".format(CRASHED)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=30)
+    assert result.returncode == CRASHED, result.stderr
+
+
+def test_round_trip_appends_shas_oldest_first(tmp_path):
+    store = BaselineStore(str(tmp_path / "b.db"))
+    save(store, "b", new_shas=["a", "b"])
+    save(store, "c", new_shas=["b", "c"])
+
+    data = store.load(REPO)
+    assert data["head_sha"] == "c"
+    assert data["hash"] == "hash-c"
+    assert data["validators"] == {"etag": '"e"'}
+    assert data["known_shas"] == ["a", "b", "c"]
+    assert store.head(REPO) == "c"
+    assert store.load("other/repo") is None
+
+
+def test_reset_replaces_history_and_max_shas_trims_oldest(tmp_path):
+    store = BaselineStore(str(tmp_path / "b.db"))
+    save(store, "c", new_shas=["a", "b", "c"])
+    save(store, "e", new_shas=["d", "e"], max_shas=3)
+    assert store.load(REPO)["known_shas"] == ["c", "d", "e"]
+
+    save(store, "x", new_shas=["x"], reset=True)
+    assert store.load(REPO)["known_shas"] == ["x"]
+
+
+def test_failed_save_rolls_back_and_store_stays_writable(tmp_path):
+    store = BaselineStore(str(tmp_path / "b.db"))
+    save(store, "a", new_shas=["a"])
+
+    with pytest.raises(TypeError):
+        store.save(REPO, "h", "b", {"etag": object()}, [], new_shas=["b"])
+
+    assert store.load(REPO)["known_shas"] == ["a"]
+    save(store, "c", new_shas=["c"])
+    assert store.load(REPO)["known_shas"] == ["a", "c"]
+
+
+def test_reopen_after_process_dies_mid_transaction(tmp_path):
+    db_path = tmp_path / "b.db"
+    store = BaselineStore(str(db_path))
+    save(store, "a", new_shas=["a"])
+    store.close()
+
+    # Killed between the writes and COMMIT: none of it may become visible
+    run_child(db_path, """
+        store._conn.execute("BEGIN IMMEDIATE")
+        store._conn.execute("UPDATE baselines SET head_sha = 'torn'")
+        store._conn.execute("INSERT INTO commits (repo, sha) VALUES ('octo/repo', 'torn')")
+    """)
+
+    reopened = BaselineStore(str(db_path))
+    data = reopened.load(REPO)
+    assert data["head_sha"] == "a"
+    assert data["known_shas"] == ["a"]
+    save(reopened, "b", new_shas=["b"])
+    assert reopened.load(REPO)["known_shas"] == ["a", "b"]
+
+
+def test_reopen_recovers_committed_write_left_in_the_wal(tmp_path):
+    db_path = tmp_path / "b.db"
+    BaselineStore(str(db_path)).close()
+
+    # Committed but never checkpointed: the data only exists in the -wal file
+    run_child(db_path, """
+        store.save('octo/repo', 'h', 'b', {}, [], new_shas=['a', 'b'])
+    """)
+    assert os.path.getsize(str(db_path) + "-wal") > 0
+
+    data = BaselineStore(str(db_path)).load(REPO)
+    assert data["head_sha"] == "b"
+    assert data["known_shas"] == ["a", "b"]
+
+
+def test_compact_keeps_data(tmp_path):
+    store = BaselineStore(str(tmp_path / "b.db"))
+    save(store, "c", new_shas=["a", "b", "c"])
+    store.compact(max_shas=2)
+    assert store.load(REPO)["known_shas"] == ["b", "c"]
+
+
+def test_import_legacy_baseline_file(tmp_path):
+    store = BaselineStore(str(tmp_path / "b.db"))
+    legacy = tmp_path / "baseline.json"
+    legacy.write_text(json.dumps({
+        "hash": "legacy-hash",
+        "head_sha": "c",
+        "validators": {"https://api.github.com/repos/octo/repo": {"etag": '"v"'}},
+        "commits": [{"sha": "c"}, {"sha": "b"}],
+        "known_shas": ["a", "b", "c"],
+    }))
+
+    assert store.import_legacy(REPO, str(legacy))
+    data = store.load(REPO)
+    assert data["hash"] == "legacy-hash"
+    assert data["head_sha"] == "c"
+    assert data["validators"] == {"https://api.github.com/repos/octo/repo": {"etag": '"v"'}}
+    assert data["commits"] == [{"sha": "c"}, {"sha": "b"}]
+    assert data["known_shas"] == ["a", "b", "c"]
+
+
+def test_import_legacy_derives_shas_from_commits(tmp_path):
+    store = BaselineStore(str(tmp_path / "b.db"))
+    save(store, "old", new_shas=["old"])
+    legacy = tmp_path / "baseline.json"
+    # The oldest format: only the newest-first commit list
+    legacy.write_text(json.dumps({"hash": "h", "commits": [{"sha": "c"}, {"sha": "b"}, {"sha": ""}]}))
+
+    assert store.import_legacy(REPO, str(legacy))
+    data = store.load(REPO)
+    assert data["head_sha"] == "c"
+    assert data["validators"] == {}
+    assert data["known_shas"] == ["b", "c"]
+
+
+def test_import_legacy_without_file(tmp_path):
+    store = BaselineStore(str(tmp_path / "b.db"))
+    assert not store.import_legacy(REPO, str(tmp_path / "missing.json"))
+    assert store.load(REPO) is None
@@ -0,0 +1,85 @@
+"""Tests for the streaming, size-bounded JSON reader"""
+import json
+
+import pytest
+
+from bounded_json import BoundedJSONReader, ResponseTooLarge, load_bounded
+
+DOCUMENT = {
+    "sha": "abc123",
+    "commits": [{"message": "Fix \"quoted\" path C:\\tmp\nsecond line", "author": "Zoë"}],
+    "files": [
+        {"filename": "src/ünïcode.py", "status": "modified", "additions": 3, "patch": "@@ -1 +1 @@\n-a\n+b"},
+        {"filename": "emoji.txt", "patch": "🚀 \u00e9\t\u2028 done"},
+    ],
+    "empty": "",
+    "flags": [True, False, None, -1.5e3],
+}
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64])
+def test_any_chunk_boundary_parses_like_json_loads(ensure_ascii, size):
+    # Single bytes split multi-byte UTF-8, \uXXXX escapes, keys and literals
+    body = json.dumps(DOCUMENT, ensure_ascii=ensure_ascii).encode("utf-8")
+    assert load_bounded(chunked(body, size)) == DOCUMENT
+
+
+def test_long_values_are_truncated_per_key():
+    body = json.dumps({
+        "filename": "f" * 50,
+        "patch": "p" * 50,
+        "nested": {"patch": "q" * 50, "message": "m" * 50},
+    }).encode()
+
+    reader = BoundedJSONReader(default_limit=20, key_limits={"patch": 5})
+    for chunk in chunked(body, 3):
+        reader.feed(chunk)
+
+    assert reader.result() == {
+        "filename": "f" * 20,
+        "patch": "p" * 5,
+        "nested": {"patch": "q" * 5, "message": "m" * 20},
+    }
+    assert reader.truncated_strings == 4
+
+
+def test_truncation_never_splits_an_escape_sequence():
+    body = json.dumps({"patch": "abcd\u00e9\n" + "x" * 10}, ensure_ascii=True).encode()
+    for size in (1, 4, len(body)):
+        result = load_bounded(chunked(body, size), key_limits={"patch": 6})
+        # "abcd" plus the 6-character \u00e9 escape would overflow: it is dropped whole
+        assert result == {"patch": "abcd"}
+
+
+def test_keys_are_never_truncated():
+    key = "k" * 40
+    body = json.dumps({key: "v" * 40}).encode()
+    assert load_bounded(chunked(body, 7), default_limit=10) == {key: "v" * 10}
+
+
+def test_body_at_the_byte_limit_is_accepted():
+    body = json.dumps({"a": "b" * 100}).encode()
+    assert load_bounded(chunked(body, 10), max_bytes=len(body)) == {"a": "b" * 100}
+
+
+def test_oversize_body_is_rejected_while_streaming():
+    body = json.dumps({"a": "b" * 100}).encode()
+    reader = BoundedJSONReader(max_bytes=55)
+    accepted = 0
+    with pytest.raises(ResponseTooLarge):
+        for chunk in chunked(body, 10):
+            reader.feed(chunk)
+            accepted += len(chunk)
+    # Rejected on the chunk that crossed the limit, long before the body ended
+    assert accepted == 50
+    assert reader.bytes_read == 60
+
+
+def test_malformed_body_still_raises():
+    with pytest.raises(ValueError):
+        load_bounded([b'{"a": [1, 2'])
@@ -0,0 +1,163 @@
+"""
+Token Budget: OpenAI token accounting and prompt compaction
+Every completion reserves its estimated prompt + completion tokens against
+per-minute and per-day budgets before it is sent, and settles to the usage
+the response reports. When a budget is exhausted callers fall back to the
+local analysis/formats instead of calling GPT. Prompts are compacted to
+max_prompt_tokens so bursts of commits can't produce unbounded prompts.
+"""
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import date
+from typing import Deque, Dict, List, Optional
+
+from metrics import OPENAI_BUDGET
+from agent_logging import fields, get_logger
+
+log = get_logger("token_budget")
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Local BPE-style estimate: one token per short word or symbol, long words split"""
+    if not text:
+        return 0
+    return sum(1 + (len(piece) - 1) // 6 for piece in _WORD.findall(text))
+
+
+def usage_tokens(response) -> Optional[int]:
+    """Prompt + completion tokens reported by a response, if any"""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return None
+    return (getattr(usage, 'prompt_tokens', 0) or 0) + (getattr(usage, 'completion_tokens', 0) or 0)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = " …[truncated]") -> str:
+    """Cut text to roughly max_tokens, keeping the beginning"""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    return text[:int(len(text) * max_tokens / tokens)].rstrip() + marker
+
+
+def fit_lines(lines: List[str], max_tokens: int, noun: str = "items") -> List[str]:
+    """Keep leading lines within max_tokens and summarize the rest in one line"""
+    kept: List[str] = []
+    used = 0
+    summary_tokens = 8
+    for index, line in enumerate(lines):
+        cost = estimate_tokens(line)
+        last = index == len(lines) - 1
+        if used + cost > max_tokens - (0 if last else summary_tokens):
+            kept.append(f"  … and {len(lines) - index} more {noun}")
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+class Reservation:
+    """Tokens counted for one completion, adjusted in place when it settles"""
+    __slots__ = ('at', 'day', 'tokens')
+
+    def __init__(self, at: float, day: date, tokens: int):
+        self.at = at
+        self.day = day
+        self.tokens = tokens
+
+
+class TokenBudget:
+    def __init__(self, per_minute: int = 0, per_day: int = 0, max_prompt_tokens: int = 1500):
+        # 0 disables a limit
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.max_prompt_tokens = max_prompt_tokens
+
+        self._lock = threading.Lock()
+        self._minute: Deque[Reservation] = deque()
+        self._minute_used = 0
+        self._day = date.today()
+        self._day_used = 0
+        self.denied = 0
+
+    @classmethod
+    def from_env(cls) -> 'TokenBudget':
+        """Build a budget from OPENAI_TOKENS_PER_MINUTE / OPENAI_TOKENS_PER_DAY / OPENAI_MAX_PROMPT_TOKENS"""
+        return cls(
+            per_minute=int(os.getenv('OPENAI_TOKENS_PER_MINUTE', '0')),
+            per_day=int(os.getenv('OPENAI_TOKENS_PER_DAY', '0')),
+            max_prompt_tokens=int(os.getenv('OPENAI_MAX_PROMPT_TOKENS', '1500'))
+        )
+
+    def _roll(self, now: float) -> None:
+        while self._minute and self._minute[0].at <= now - 60:
+            self._minute_used -= self._minute.popleft().tokens
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self._day_used = 0
+
+    def reserve(self, tokens: int, operation: str = "completion") -> Optional[Reservation]:
+        """Reserve tokens for one completion; None means the caller should use its fallback"""
+        with self._lock:
+            now = time.monotonic()
+            self._roll(now)
+            over_minute = self.per_minute and self._minute_used + tokens > self.per_minute
+            over_day = self.per_day and self._day_used + tokens > self.per_day
+            if over_minute or over_day:
+                self.denied += 1
+                OPENAI_BUDGET.inc(operation=operation, decision="denied")
+                log.warning("⏸️ Token budget exhausted, using local fallback", extra=fields(
+                    operation=operation, requested=tokens,
+                    window="minute" if over_minute else "day"
+                ))
+                return None
+            reservation = Reservation(now, self._day, tokens)
+            self._minute.append(reservation)
+            self._minute_used += tokens
+            self._day_used += tokens
+        OPENAI_BUDGET.inc(operation=operation, decision="allowed")
+        return reservation
+
+    def reserve_for(self, prompt: str, max_tokens: int, operation: str = "completion") -> Optional[Reservation]:
+        """Reserve the estimated cost of prompt plus max_tokens of output"""
+        return self.reserve(estimate_tokens(prompt) + max_tokens, operation)
+
+    def settle(self, reservation: Reservation, used: Optional[int]) -> None:
+        """Replace a reservation by the tokens actually used (None keeps the reservation)"""
+        if used is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._roll(now)
+            # Correct the windows the reservation is still counted in, keeping its timestamp
+            delta = used - reservation.tokens
+            if reservation.at > now - 60:
+                self._minute_used += delta
+            if reservation.day == self._day:
+                self._day_used += delta
+            reservation.tokens = used
+
+    def used(self) -> Dict[str, int]:
+        """Tokens counted in the current minute and day windows"""
+        with self._lock:
+            self._roll(time.monotonic())
+            return {'minute': self._minute_used, 'day': self._day_used}
+
+    def stats(self) -> Dict:
+        return dict(self.used(), per_minute=self.per_minute, per_day=self.per_day, denied=self.denied)
+
+    def split(self, parts: int) -> None:
+        """Keep 1/parts of the limits, for one of several processes sharing the quota"""
+        parts = max(1, parts)
+        with self._lock:
+            self.per_minute = math.ceil(self.per_minute / parts)
+            self.per_day = math.ceil(self.per_day / parts)
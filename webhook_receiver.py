@@ -0,0 +1,169 @@
+"""
+Webhook Receiver: Push-driven change detection for Ar-Nab-h
+A local HTTP listener for GitHub webhooks. Verified `push` events to a
+monitored repository's default branch trigger an immediate check through
+the repo scheduler (same detect_changes -> parent report path as polling),
+while polling slows down to a reconciliation interval.
+"""
+import hashlib
+import hmac
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from agent_logging import fields, get_logger
+from metrics import WEBHOOK_EVENTS
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+log = get_logger("webhook_receiver")
+
+MAX_BODY_BYTES = 25 * 1024 * 1024  # GitHub caps webhook payloads at 25 MB
+NULL_SHA = "0" * 40
+
+
+def reconcile_interval() -> float:
+    """Polling interval used while webhooks deliver changes (WEBHOOK_RECONCILE_INTERVAL)"""
+    return float(os.getenv('WEBHOOK_RECONCILE_INTERVAL', '300'))
+
+
+def webhooks_enabled() -> bool:
+    return bool(os.getenv('WEBHOOK_PORT'))
+
+
+class WebhookReceiver:
+    def __init__(self, scheduler, secret: str, host: str = "127.0.0.1", port: int = 8090,
+                 path: str = "/webhook"):
+        if not secret:
+            raise ValueError("GITHUB_WEBHOOK_SECRET is required to verify webhook signatures")
+        self.scheduler = scheduler
+        self.secret = secret.encode()
+        self.host = host
+        self.port = port
+        self.path = path
+
+        # Recent X-GitHub-Delivery ids, so redelivered events are not checked twice
+        self._deliveries: 'OrderedDict[str, None]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._server: Optional['ThreadingHTTPServer'] = None
+
+    @classmethod
+    def from_env(cls, scheduler) -> Optional['WebhookReceiver']:
+        """Build a receiver from WEBHOOK_PORT / WEBHOOK_HOST / GITHUB_WEBHOOK_SECRET, or None if disabled"""
+        if not webhooks_enabled():
+            return None
+        return cls(
+            scheduler,
+            secret=os.getenv('GITHUB_WEBHOOK_SECRET', ''),
+            host=os.getenv('WEBHOOK_HOST', '127.0.0.1'),
+            port=int(os.getenv('WEBHOOK_PORT')),
+            path=os.getenv('WEBHOOK_PATH', '/webhook')
+        )
+
+    def verify_signature(self, body: bytes, signature: Optional[str]) -> bool:
+        """Check X-Hub-Signature-256 (sha256=<hex HMAC of the raw body>)"""
+        if not signature or not signature.startswith('sha256='):
+            return False
+        expected = hmac.new(self.secret, body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature[len('sha256='):])
+
+    def _seen_delivery(self, delivery: Optional[str]) -> bool:
+        if not delivery:
+            return False
+        with self._lock:
+            if delivery in self._deliveries:
+                return True
+            self._deliveries[delivery] = None
+            while len(self._deliveries) > 1024:
+                self._deliveries.popitem(last=False)
+            return False
+
+    def handle_event(self, event: str, delivery: Optional[str], payload: Dict) -> Tuple[int, str]:
+        """Act on a verified delivery; returns (HTTP status, message)"""
+        if event == 'ping':
+            return 200, "pong"
+        if event != 'push':
+            return 202, f"ignored event '{event}'"
+        if self._seen_delivery(delivery):
+            return 200, "duplicate delivery"
+
+        repository = payload.get('repository') or {}
+        full_name = repository.get('full_name', '')
+        default_branch = repository.get('default_branch') or repository.get('master_branch')
+        if default_branch and payload.get('ref') != f"refs/heads/{default_branch}":
+            return 202, "push to a non-default branch"
+        if payload.get('after', NULL_SHA) == NULL_SHA:
+            return 202, "branch deletion"
+
+        if not self.scheduler.trigger(full_name):
+            return 202, f"repository '{full_name}' is not monitored"
+        log.info("🪝 Push received, checking now", extra=fields(
+            repository=full_name, head=payload.get('after', '')[:7],
+            commits=len(payload.get('commits') or [])
+        ))
+        return 202, "check scheduled"
+
+    def _make_handler(self):
+        from http.server import BaseHTTPRequestHandler
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, message: str) -> None:
+                body = json.dumps({'message': message}).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                event = self.headers.get('X-GitHub-Event', 'unknown')
+                if self.path.split('?')[0] != receiver.path:
+                    self._reply(404, "not found")
+                    return
+                length = int(self.headers.get('Content-Length') or 0)
+                if length > MAX_BODY_BYTES:
+                    WEBHOOK_EVENTS.inc(event=event, outcome="too_large")
+                    self._reply(413, "payload too large")
+                    return
+                body = self.rfile.read(length)
+                if not receiver.verify_signature(body, self.headers.get('X-Hub-Signature-256')):
+                    WEBHOOK_EVENTS.inc(event=event, outcome="bad_signature")
+                    log.warning("⚠️ Rejected webhook with invalid signature", extra=fields(event=event))
+                    self._reply(401, "invalid signature")
+                    return
+                try:
+                    payload = json.loads(body or b'{}')
+                except ValueError:
+                    WEBHOOK_EVENTS.inc(event=event, outcome="bad_payload")
+                    self._reply(400, "invalid JSON")
+                    return
+                status, message = receiver.handle_event(event, self.headers.get('X-GitHub-Delivery'), payload)
+                WEBHOOK_EVENTS.inc(event=event, outcome="triggered" if message == "check scheduled" else "ignored")
+                self._reply(status, message)
+
+        return Handler
+
+    def start(self) -> 'WebhookReceiver':
+        """Serve webhooks on a daemon thread"""
+        from http.server import ThreadingHTTPServer
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="Webhook-Receiver", daemon=True).start()
+        log.info("🪝 Webhook receiver listening", extra=fields(
+            url=f"http://{self.host}:{self.port}{self.path}", reconcile_interval=reconcile_interval()
+        ))
+        return self
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None